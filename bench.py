@@ -0,0 +1,224 @@
+"""Benchmarks for the Account Lister's hot paths.
+
+Generates synthetic `act.txt` files and times loading, saving and the list operations of
+`thelonglist.py`, printing one JSON document so runs can be compared across commits:
+
+    python bench.py                       # 100, 1k, 10k and 100k accounts
+    python bench.py --sizes 1000 --output bench_output.txt
+
+Each size runs in its own process so peak memory is measured cleanly. The Tk benchmarks need a
+display (on a headless Linux box, run under `xvfb-run`); without one only the model layer is timed.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+import thelonglist
+
+SERVERS = ["Blue", "Green", "Red"]
+NOTE_WORDS = ["bank", "mule", "port", "bot", "tradeskill", "epic", "guild", "main", "alt", "buffer", "pally",
+              "camp", "farming", "keyed", "sky", "hate", "fear", "naggy", "vox", "plane", "of", "the", "for"]
+
+
+def generate_state(count, seed=1999):
+    """Returns act.txt state with `count` accounts spread over every class and server."""
+    rng = random.Random(seed)
+    eq_classes = thelonglist.EQ_CLASSES
+    accounts = []
+    for i in range(count):
+        note_length = rng.choice([0, 0, 2, 4, 8, 16])
+        accounts.append({
+            "name": f"{rng.choice('BCDFGKLMNPRSTVZ')}{rng.choice('aeiou')}{rng.choice('lnrstvx')}{i:06d}",
+            "level": rng.randint(1, 60),
+            "server": SERVERS[i % len(SERVERS)],
+            "class": eq_classes[i % len(eq_classes)],
+            "username": f"acct_{rng.randrange(10 ** 6):06d}",
+            "password": "".join(rng.choice("abcdefghijkmnpqrstuvwxyz23456789") for _ in range(10)),
+            "note": " ".join(rng.choice(NOTE_WORDS) for _ in range(note_length)),
+        })
+    names = [account["name"] for account in accounts]
+    return {
+        "accounts": accounts,
+        "recent": rng.sample(names, min(3, count)),
+        "favorites": rng.sample(names, min(max(count // 50, 1), 200, count)),
+        "last_server": "All",
+        "window_position": {"x": 100, "y": 100, "width": 420, "height": 700},
+        "expanded_classes": {eq_class: True for eq_class in eq_classes},
+        "alpha": 0.95,
+    }
+
+
+def timed(function, runs):
+    """Runs `function` `runs` times and returns its timings in milliseconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"mean_ms": round(sum(times) / len(times), 3), "min_ms": round(min(times), 3), "runs": runs}
+
+
+def bench_model(state, runs):
+    """Times the parts that need no widgets: parsing, caching, indexing, searching and saving."""
+    results = {}
+    with open(thelonglist.DATA_FILE, "w") as f: json.dump(state, f, indent=4)
+    thelonglist.DataWriter.write_cache(thelonglist.DATA_FILE, state, thelonglist.DataWriter.stamp(thelonglist.DATA_FILE))
+
+    def parse():
+        with open(thelonglist.DATA_FILE) as f: json.load(f)
+    results["json_parse"] = timed(parse, runs)
+    results["cache_load"] = timed(lambda: thelonglist.DataWriter.read_cache(thelonglist.DATA_FILE), runs)
+    results["store_build"] = timed(lambda: thelonglist.AccountStore(state["accounts"], state["favorites"], state["recent"]), runs)
+    store = thelonglist.AccountStore(state["accounts"], state["favorites"], state["recent"])
+
+    def class_queries():
+        for eq_class in thelonglist.EQ_CLASSES:
+            for server in ["All"] + SERVERS: store.class_members(eq_class, server)
+    results["class_queries"] = timed(class_queries, runs)
+
+    index = thelonglist.SearchIndex()
+    def build_index():
+        for account in store.records.values(): index.add(account)
+    results["search_build"] = timed(build_index, 1)
+    results["search_query"] = timed(lambda: [index.search(query) for query in ("b", "ba", "ban", "bank", "acct_1", "epic main")], runs)
+    results["save_snapshot"] = timed(lambda: thelonglist.DataWriter.write_atomic(thelonglist.DATA_FILE, state), runs)
+    return results
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def bench_tk(runs):
+    """Times the Tk hot paths against the act.txt in the current directory."""
+    results = {}
+    app = thelonglist.actlist()
+    while app.pending_sections: app._populate_next_section()
+    app.root.update()
+    store = app.store
+    results["load_data"] = timed(app.load_data, runs)
+    app.store = store # load_data swapped in stores without the app's listener, which the view cache's versions rely on
+    app.refresh_character_list()
+    app.scheduler.flush()
+    app.root.update()
+
+    def save():
+        app.flush_data()
+        app.writer.flush()
+    results["save_data"] = timed(save, runs)
+    # The list only marks what changed; flush the frame so the timings include the layout work.
+    # Uncached steps clear the view cache first so they time building the list, not reusing it.
+    def refresh(cached):
+        if not cached: app.view_cache.clear()
+        app.refresh_character_list()
+        app.scheduler.flush()
+    results["refresh_character_list"] = timed(lambda: refresh(False), runs)
+    results["refresh_character_list_cached"] = timed(lambda: refresh(True), runs)
+
+    rows = [row for row in app.list_view.bound.values() if row.kind == 'char']
+    if rows:
+        results["on_character_click"] = timed(lambda: app.on_character_click(rows[0].character), runs)
+        name = rows[0].character.name
+        results["toggle_favorite"] = timed(lambda: (app.toggle_favorite(name), app.scheduler.flush()), runs)
+
+    servers = itertools.cycle(SERVERS)
+    def change_server(cached):
+        if not cached: app.view_cache.clear()
+        app.server_var.set(next(servers))
+        app.on_server_change()
+        app.scheduler.flush()
+    results["on_server_change"] = timed(lambda: change_server(False), runs)
+    for _ in SERVERS: change_server(True) # every server laid out once, so the cached runs only hit
+    results["on_server_change_cached"] = timed(lambda: change_server(True), runs)
+    app.server_var.set("All")
+    app.on_server_change()
+    app.scheduler.flush()
+
+    widths = iter(range(300, 300 + 7 * runs, 7))
+    def resize():
+        app.list_view.set_width(next(widths))
+        app.update_text_truncation()
+    results["resize_truncation"] = timed(resize, runs)
+    app.root.update()
+    widgets = count_widgets(app.root)
+    app.on_exit()
+    return results, widgets
+
+
+def run_size(count, runs):
+    """Benchmarks one roster size in a scratch directory and returns its result record."""
+    state = generate_state(count)
+    record = {"accounts": count}
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        record["model"] = bench_model(state, runs)
+        text = json.dumps(state)
+        tracemalloc.start()
+        loaded = json.loads(text)
+        store = thelonglist.AccountStore(loaded.pop("accounts"), loaded["favorites"], loaded["recent"])
+        record["store_retained_bytes"], record["store_peak_bytes"] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del store, loaded, text
+        tk = thelonglist.load_tk()
+        try:
+            record["tk"], record["widgets"] = bench_tk(runs)
+        except tk.TclError as e:
+            record["tk"], record["tk_skipped"] = None, str(e)
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        record["peak_rss_kb"] = peak // 1024 if sys.platform == "darwin" else peak
+    return record
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Account Lister's hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000], help="roster sizes to benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per operation")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_size(args.worker, args.runs)))
+        return
+
+    results = []
+    for count in args.sizes:
+        worker = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", str(count), "--runs", str(args.runs)],
+                                capture_output=True, text=True)
+        if worker.returncode != 0:
+            results.append({"accounts": count, "error": worker.stderr.strip().splitlines()[-1:]})
+            continue
+        results.append(json.loads(worker.stdout.strip().splitlines()[-1]))
+    report = {"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(), "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f: f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,961 @@
+"""The account model behind `thelonglist.py`: records, the store, search, persistence, the
+single-instance lock, roster import/export and the command-line queries. Nothing here imports Tk.
+
+It lives in its own module so Python caches it as bytecode: `thelonglist.py` is run as a script,
+which is compiled afresh on every launch, so keeping it to the window code starts every mode faster.
+"""
+import bisect
+import csv
+import json
+import marshal
+import os
+import re
+import secrets
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+EQ_CLASSES = ["Bard", "Cleric", "Druid", "Enchanter", "Magician", "Monk", "Necromancer",
+              "Paladin", "Ranger", "Rogue", "Shadow Knight", "Shaman", "Warrior", "Wizard"]
+
+
+# --- Search ---
+class SearchIndex:
+    """ Search over account names, notes and usernames.
+
+    Every query term must match. Terms of three or more characters match anywhere in a field and are
+    looked up through a trigram index; shorter terms match the start of a word through a sorted word
+    list. A query that only extends the previous one is answered by narrowing the previous result.
+    """
+    FIELDS = ("name", "note", "username")
+    WORD_RE = re.compile(r"\w+")
+    SCAN_LIMIT = 500 # narrowing a result this small by scanning its texts beats an index lookup
+
+    def __init__(self):
+        self.texts = {}
+        self.trigrams = {}
+        self.words = []
+        self.words_stale = False # `words` is re-sorted from `word_names` on the next prefix lookup
+        self.word_names = {}
+        self.last_terms, self.last_result = None, None
+
+    @classmethod
+    def searchable_text(cls, account):
+        return "\n".join(str(getattr(account, field)) for field in cls.FIELDS).lower()
+
+    def add(self, account):
+        name = account.name
+        if name in self.texts: self.remove(name)
+        text = self.texts[name] = self.searchable_text(account)
+        for trigram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            self.trigrams.setdefault(trigram, set()).add(name)
+        for word in set(self.WORD_RE.findall(text)):
+            names = self.word_names.get(word)
+            if names is None:
+                names = self.word_names[word] = set()
+                self.words_stale = True
+            names.add(name)
+        self.last_terms = None
+
+    def remove(self, name):
+        text = self.texts.pop(name, None)
+        if text is None: return
+        for trigram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            names = self.trigrams[trigram]
+            names.discard(name)
+            if not names: del self.trigrams[trigram]
+        for word in set(self.WORD_RE.findall(text)):
+            names = self.word_names[word]
+            names.discard(name)
+            if not names:
+                del self.word_names[word]
+                self.words_stale = True
+        self.last_terms = None
+
+    def apply(self, op, store):
+        """Keeps the index in step with an AccountStore change record."""
+        kind, name = op["op"], op.get("name")
+        if kind == "add": self.add(store.get(op["account"]["name"]))
+        elif kind == "update":
+            self.remove(name)
+            self.add(store.get(op["changes"].get("name", name)))
+        elif kind == "delete": self.remove(name)
+
+    def _filter(self, names, term):
+        """Returns the names whose text matches a single term."""
+        texts = self.texts
+        if len(term) >= 3: return {name for name in names if term in texts.get(name, "")}
+        if self.WORD_RE.fullmatch(term) is None: return set() # Words never contain other characters
+        word_start = re.compile(r"\b" + re.escape(term))
+        return {name for name in names if word_start.search(texts.get(name, ""))}
+
+    def _candidates(self, term, within=None):
+        """Returns the names matching `term` through the index, limited to `within` if given."""
+        if len(term) >= 3:
+            postings = [self.trigrams.get(term[i:i + 3], set()) for i in range(len(term) - 2)]
+            postings = sorted(postings if within is None else postings + [within], key=len)
+            names = set(postings[0]).intersection(*postings[1:])
+            return names if len(term) == 3 else {name for name in names if term in self.texts[name]}
+        if self.words_stale:
+            self.words = sorted(self.word_names)
+            self.words_stale = False
+        names = set()
+        for i in range(bisect.bisect_left(self.words, term), len(self.words)):
+            if not self.words[i].startswith(term): break
+            names.update(self.word_names[self.words[i]])
+        return names if within is None else names & within
+
+    def _narrow(self, names, term):
+        """Returns the names in `names` matching `term`, by scanning their texts or through the index,
+        whichever touches fewer names."""
+        if len(term) >= 3:
+            smallest = min(len(self.trigrams.get(term[i:i + 3], ())) for i in range(len(term) - 2))
+            if smallest >= len(names): return self._filter(names, term)
+        elif len(names) <= self.SCAN_LIMIT: return self._filter(names, term)
+        return self._candidates(term, names)
+
+    def _narrows(self, terms):
+        """True if every result for `terms` is also a result for the previous query."""
+        last = self.last_terms
+        if not last or len(terms) < len(last): return False # nothing to narrow after an empty query
+        return all(new.startswith(old) and not (len(old) < 3 <= len(new)) for old, new in zip(last, terms))
+
+    def search(self, query):
+        """Returns the set of names matching every term of `query`."""
+        terms = query.lower().split()
+        if self._narrows(terms):
+            result = self.last_result
+            for i, term in enumerate(terms):
+                if i >= len(self.last_terms) or term != self.last_terms[i]: result = self._narrow(result, term)
+        else:
+            result = None
+            for term in terms:
+                result = self._candidates(term) if result is None else self._narrow(result, term)
+                if not result: break
+            result = result or set()
+        self.last_terms, self.last_result = terms, result
+        return result
+
+
+# --- Persistence ---
+DATA_FILE = "act.txt"
+CACHE_VERSION = 2 # accounts are cached as Account.pack() tuples
+
+class DataWriter:
+    """ Writes application state to disk on a background thread.
+
+    Work is queued as jobs: full snapshots of `act.txt`, batches of journal records appended to
+    `act.txt.log`, and refreshes of the binary `act.txt.cache` used for fast startup. A snapshot supersedes everything queued before it, so a burst of saves costs one
+    write. Snapshots go to a temp file that is fsynced and then atomically swapped in with
+    `os.replace`, so a crash never leaves a partial file; writing one also empties the journal.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.log_path = path + ".log"
+        self.jobs = deque()
+        self.writing = False
+        self.closed = False
+        self.error = None
+        self.snapshot_stamp = None # stamp() of the last snapshot written, to tell our writes from others'
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="DataWriter", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def stamp(path):
+        """Returns (mtime_ns, size) for `path`, or None if it doesn't exist."""
+        try: stat = os.stat(path)
+        except OSError: return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def read_cache(path, current=True):
+        """Returns the state cached for `path`, or None if there is no cache or `path` changed since.
+        With `current=False`, returns the cached state even if `path` changed since."""
+        try:
+            stat = os.stat(path)
+            with open(path + ".cache", "rb") as f:
+                version, mtime_ns, size, data = marshal.loads(f.read()) # Far faster than marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != CACHE_VERSION or current and (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size): return None
+        return data
+
+    @staticmethod
+    def read_json(path):
+        """Parses `path` and returns (state, stamp). The stamp is taken from the open handle before
+        parsing, so an edit landing meanwhile makes a cache of this state look stale, never current."""
+        with open(path, "r") as f:
+            stat = os.fstat(f.fileno())
+            return json.load(f), (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def write_cache(path, data, stamp):
+        """Stores parsed state as a marshal file stamped with `stamp`, the (mtime_ns, size) `path` had
+        when the state was read or written, with its accounts packed into tuples (see Account.pack)
+        so loading them builds no dicts."""
+        accounts = [account.pack() if isinstance(account, Account) else Account.pack_dict(account) if isinstance(account, dict) else account
+                    for account in data.get("accounts", []) if not isinstance(account, dict) or all(key in account for key in ("name", "server", "class"))]
+        data = {**data, "accounts": accounts}
+        # marshal serializes in one C call holding the GIL, so state shared with the UI thread is
+        # captured consistently.
+        blob = marshal.dumps((CACHE_VERSION, *stamp, data))
+        temp_path = path + ".cache.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(blob)
+        os.replace(temp_path, path + ".cache")
+
+    @staticmethod
+    def write_atomic(path, data):
+        """Replaces `path` with `data` as JSON and returns the (mtime_ns, size) stamp of what was written."""
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+            stat = os.fstat(f.fileno()) # os.replace keeps both
+        os.replace(temp_path, path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def read_journal(path):
+        """Yields the records journaled in `path` + ".log", stopping at a torn final record."""
+        try: f = open(path + ".log", "r")
+        except FileNotFoundError: return
+        with f:
+            for line in f:
+                try: yield json.loads(line)
+                except json.JSONDecodeError: return # A torn final record from a crash mid-append
+
+    def submit(self, data):
+        """Queues a full snapshot, dropping any queued work it makes redundant."""
+        with self.condition:
+            self.jobs.clear()
+            self.jobs.append(("snapshot", data))
+            self.condition.notify_all()
+
+    def cache(self, data, stamp):
+        """Queues a refresh of the binary cache with state read from `act.txt` when it had `stamp`."""
+        with self.condition:
+            self.jobs.append(("cache", (data, stamp)))
+            self.condition.notify_all()
+
+    def append(self, records):
+        """Queues journal records to be appended to the log."""
+        with self.condition:
+            if self.jobs and self.jobs[-1][0] == "append": self.jobs[-1][1].extend(records)
+            else: self.jobs.append(("append", list(records)))
+            self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Blocks until everything submitted so far is on disk."""
+        with self.condition:
+            self.condition.wait_for(lambda: not self.jobs and not self.writing, timeout)
+
+    def close(self):
+        self.flush()
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.jobs or self.closed)
+                if not self.jobs: return
+                (kind, payload), self.writing = self.jobs.popleft(), True
+            try:
+                if kind == "snapshot":
+                    self.snapshot_stamp = self.write_atomic(self.path, payload)
+                    if os.path.exists(self.log_path): os.remove(self.log_path)
+                    self.write_cache(self.path, payload, self.snapshot_stamp)
+                elif kind == "cache":
+                    self.write_cache(self.path, *payload)
+                else:
+                    with open(self.log_path, "a") as f:
+                        f.writelines(json.dumps(record) + "\n" for record in payload)
+                        f.flush()
+                        os.fsync(f.fileno())
+                self.error = None
+            except OSError as e:
+                self.error = e
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+
+class ExternalEdit:
+    """ What an edit made outside the app changed in `act.txt`, worked out off the UI thread.
+
+    `base` is the state the app last loaded or saved (from the binary cache, which still describes
+    it). Without one, `changed` is None and every account has to be compared with the app's.
+    """
+    def __init__(self, state, base):
+        self.state = state
+        self.accounts, self.shadowed = self.by_name(state)
+        self.base = self.changed = None
+        self.favorites_added = self.favorites_removed = frozenset()
+        if base is not None:
+            self.base = self.by_name(base)[0]
+            self.changed = {name for name in self.base.keys() | self.accounts.keys() if self.base.get(name) != self.accounts.get(name)}
+            theirs, before = set(state.get("favorites", [])), set(base.get("favorites", []))
+            self.favorites_added, self.favorites_removed = theirs - before, before - theirs
+
+    @staticmethod
+    def by_name(state):
+        """Returns ({name: packed account}, shadowed) for the well-formed accounts of a state, first name wins."""
+        accounts, shadowed = {}, []
+        for account in state.get("accounts", []):
+            if isinstance(account, dict):
+                if not all(key in account for key in ("name", "server", "class")): continue
+                account = Account.pack_dict(account)
+            if account[0] in accounts: shadowed.append(account)
+            else: accounts[account[0]] = account
+        return accounts, shadowed
+
+    def merge(self, store, unsaved, on_change=None):
+        """Applies the edit to `store` record by record and returns (changed names, conflicts).
+
+        A character changed both in the store (its name is in `unsaved`, not yet saved to act.txt) and
+        in the file is a conflict: the store's version is kept. `on_change(account)` is called with
+        each record before it changes and again after, so the caller can tell what to redraw.
+        """
+        notify = on_change or (lambda account: None)
+        names = self.changed if self.changed is not None else self.accounts.keys() | store.records.keys()
+        changed, conflicts = [], []
+        for name in names:
+            theirs, ours = self.accounts.get(name), store.get(name)
+            ours_packed = ours.pack() if ours is not None else None
+            if theirs == ours_packed: continue
+            if name in unsaved and (self.base is None or ours_packed != self.base.get(name)):
+                conflicts.append(name)
+                continue
+            if ours is not None: notify(ours)
+            if theirs is None: store.delete(name)
+            elif ours is None: store.add(Account(*theirs))
+            else:
+                theirs, ours = Account(*theirs).to_dict(), ours.to_dict()
+                store.update(name, {key: value for key, value in theirs.items() if ours.get(key) != value})
+            if theirs is not None: notify(store.get(name))
+            changed.append(name)
+        for name in self.favorites_added | self.favorites_removed:
+            if name in store and store.is_favorite(name) != (name in self.favorites_added):
+                notify(store.get(name))
+                store.toggle_favorite(name)
+                notify(store.get(name))
+        store.shadowed = [Account(*account) for account in self.shadowed]
+        return changed, conflicts
+
+
+# --- Single Instance ---
+class InstanceLock:
+    """ Keeps to one running app per `act.txt`.
+
+    The first process takes an OS lock on `act.txt.lock` (released by the OS if the process dies) and
+    listens on a localhost socket whose port and token it writes into the lock file. Later launches
+    find the lock taken and send their request through that socket instead of starting.
+    """
+    LOCK_OFFSET = 4096 # Windows locks a byte range; lock one past the port info so it stays readable
+
+    def __init__(self, path=DATA_FILE):
+        self.path = path + ".lock"
+        self.file = None
+        self.server = None
+        self.token = None
+
+    def acquire(self):
+        """Takes the lock without waiting; returns False if another process holds it."""
+        f = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT), "r+")
+        try:
+            if fcntl is not None: fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(self.LOCK_OFFSET)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self.file = f
+        self._publish("") # A crashed predecessor's port and token must not be mistaken for ours
+        return True
+
+    def listen(self):
+        """Opens the handoff socket and publishes its address in the lock file."""
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(4)
+        self.server.setblocking(False)
+        self.token = secrets.token_hex(16)
+        self._publish(json.dumps({"port": self.server.getsockname()[1], "token": self.token, "pid": os.getpid()}))
+
+    def _publish(self, text):
+        self.file.seek(0) # Padded rather than truncated, which Windows may refuse next to a locked range
+        self.file.write(text.ljust(256))
+        self.file.flush()
+
+    def receive(self):
+        """Returns the requests later launches have sent since the last call, without blocking."""
+        messages = []
+        while True:
+            try: conn, _ = self.server.accept()
+            except OSError: return messages # Nothing waiting
+            with conn:
+                try:
+                    conn.settimeout(1)
+                    message = json.loads(conn.makefile("r").readline())
+                except (OSError, ValueError): continue
+                if isinstance(message, dict) and message.get("token") == self.token: messages.append(message)
+
+    def hand_off(self, message, timeout=3):
+        """Sends `message` to the process holding the lock. Returns True once it was delivered."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with open(self.path, "r") as f: info = json.loads(f.read(self.LOCK_OFFSET))
+                with socket.create_connection(("127.0.0.1", info["port"]), timeout=timeout) as conn:
+                    conn.sendall((json.dumps({**message, "token": info["token"]}) + "\n").encode())
+                return True
+            except (OSError, ValueError, KeyError, TypeError):
+                # A blank lock file means the running app has not opened its socket yet.
+                if time.monotonic() > deadline: return False
+                time.sleep(0.1)
+
+    def release(self):
+        if self.server is not None: self.server.close()
+        if self.file is not None: self.file.close() # Closing the file drops the lock
+        self.server = self.file = None
+
+
+# --- Account Records ---
+class Account:
+    """ One character, in a compact form for large rosters.
+
+    Server and class are stored as small codes into SERVER_NAMES and CLASS_NAMES (unknown names are
+    added on first sight), so each record holds two ints instead of two strings. Keys other than the
+    standard ones are kept in `extra`, so a record converts back to the same `act.txt` dict.
+    """
+    __slots__ = ("name", "level", "server_code", "class_code", "username", "password", "note", "extra")
+    FIELDS = ("name", "level", "server", "class", "username", "password", "note")
+    SERVER_NAMES = ["Blue", "Green", "Red"]
+    CLASS_NAMES = list(EQ_CLASSES)
+    server_codes = {name: code for code, name in enumerate(SERVER_NAMES)}
+    class_codes = {name: code for code, name in enumerate(CLASS_NAMES)}
+
+    def __init__(self, name, level, server, eq_class, username="", password="", note="", extra=None):
+        self.name = name
+        self.level = level
+        self.server_code = self.server_codes[server] if server in self.server_codes else self.intern(self.SERVER_NAMES, self.server_codes, server)
+        self.class_code = self.class_codes[eq_class] if eq_class in self.class_codes else self.intern(self.CLASS_NAMES, self.class_codes, eq_class)
+        self.username = username
+        self.password = password
+        self.note = note
+        self.extra = extra
+
+    @staticmethod
+    def intern(names, codes, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    @property
+    def server(self):
+        return self.SERVER_NAMES[self.server_code]
+
+    @server.setter
+    def server(self, value):
+        self.server_code = self.intern(self.SERVER_NAMES, self.server_codes, value)
+
+    @property
+    def eq_class(self):
+        return self.CLASS_NAMES[self.class_code]
+
+    @eq_class.setter
+    def eq_class(self, value):
+        self.class_code = self.intern(self.CLASS_NAMES, self.class_codes, value)
+
+    @classmethod
+    def of(cls, account):
+        """Returns an Account for an Account, an `act.txt` dict or a packed tuple."""
+        if isinstance(account, cls): return account
+        if isinstance(account, tuple): return cls(*account)
+        return cls(*cls.pack_dict(account))
+
+    @classmethod
+    def pack_dict(cls, account):
+        """Returns the packed tuple for an `act.txt` dict, without creating an Account."""
+        unknown = account.keys() - cls.FIELDS
+        extra = {key: value for key, value in account.items() if key in unknown} if unknown else None # in file order
+        return (account["name"], account.get("level"), account["server"], account["class"], account.get("username", ""),
+                account.get("password", ""), account.get("note", ""), extra)
+
+    def pack(self):
+        return (self.name, self.level, self.server, self.eq_class, self.username, self.password, self.note, self.extra)
+
+    def to_dict(self):
+        account = {"name": self.name, "level": self.level, "server": self.server, "class": self.eq_class,
+                   "username": self.username, "password": self.password, "note": self.note}
+        if self.extra: account.update(self.extra)
+        return account
+
+    def update(self, changes):
+        for key, value in changes.items():
+            if key == "class": self.eq_class = value
+            elif key in self.FIELDS: setattr(self, key, value)
+            else: self.extra = {**(self.extra or {}), key: value}
+
+    def __getitem__(self, key):
+        if key == "class": return self.eq_class
+        if key in self.FIELDS: return getattr(self, key)
+        if self.extra and key in self.extra: return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try: return self[key]
+        except KeyError: return default
+
+    def __repr__(self):
+        return f"Account({self.to_dict()!r})"
+
+
+# --- Account Store ---
+class AccountStore:
+    """ Account records indexed by name, server and class, plus the favorites and recent lists.
+
+    Records are Account objects built from the dicts in `act.txt` and updated in place, so a record
+    keeps its identity across edits. Each (class, server) bucket, and each class across all servers, is a
+    list of names kept sorted on insert, so every view query costs O(k) for k results. Buckets filled
+    at load time are sorted on first use, which spreads that cost over the first queries.
+
+    `version(key)` counts the changes to one slice of the store, so views built from it can be cached:
+    keys are (class, server) and (class, "All") buckets, a server or "All", "Favorites" and "Recent".
+    """
+    SERVERS = ["Blue", "Green", "Red"]
+
+    def __init__(self, accounts=(), favorites=(), recent=(), recent_limit=3):
+        self.recent_limit = recent_limit
+        self.records = {}
+        self.shadowed = [] # Later accounts reusing an existing name: not shown, but saved back untouched.
+        self.by_server = {}
+        self.by_class = {}
+        self.buckets = {}
+        for account in accounts:
+            account = Account.of(account)
+            if account.name in self.records: self.shadowed.append(account)
+            else: self._index(account)
+        self.unsorted = set(self.buckets)
+        self.favorites = sorted({name for name in favorites if name in self.records})
+        self.favorite_set = set(self.favorites)
+        self.recent = [name for name in recent if name in self.records][-recent_limit:]
+        self.versions = {}
+        self.listeners = []
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, name):
+        return self.records.get(name)
+
+    def to_list(self):
+        """Returns every account in load/insertion order, ready to be saved."""
+        return list(self.records.values()) + self.shadowed
+
+    def _emit(self, op):
+        for listener in self.listeners: listener(op)
+
+    def version(self, key):
+        return self.versions.get(key, 0)
+
+    def _touch(self, *keys):
+        for key in keys: self.versions[key] = self.versions.get(key, 0) + 1
+
+    def _touch_account(self, account):
+        """Marks every slice the account currently appears in as changed."""
+        name, server, eq_class = account.name, account.server, account.eq_class
+        self._touch((eq_class, server), (eq_class, "All"), server, "All")
+        if name in self.favorite_set: self._touch("Favorites")
+        if name in self.recent: self._touch("Recent")
+
+    # --- Indexes ---
+    def _index(self, account, sort=False, record=True):
+        name, server, eq_class = account.name, account.server, account.eq_class
+        if record: self.records[name] = account
+        self.by_server.setdefault(server, {})[name] = account
+        self.by_class.setdefault(eq_class, {})[name] = account
+        for key in ((eq_class, server), (eq_class, "All")):
+            bucket = self.buckets.setdefault(key, [])
+            if sort and key not in self.unsorted: bisect.insort(bucket, name)
+            else: bucket.append(name)
+
+    def _unindex(self, account, record=True):
+        name, server, eq_class = account.name, account.server, account.eq_class
+        if record: del self.records[name]
+        del self.by_server[server][name]
+        del self.by_class[eq_class][name]
+        for key in ((eq_class, server), (eq_class, "All")):
+            bucket = self.buckets[key]
+            if key in self.unsorted: bucket.remove(name)
+            else: del bucket[bisect.bisect_left(bucket, name)]
+
+    def _bucket(self, key):
+        bucket = self.buckets.get(key, [])
+        if key in self.unsorted:
+            bucket.sort()
+            self.unsorted.discard(key)
+        return bucket
+
+    # --- Mutations ---
+    def add(self, account):
+        """Adds an Account or `act.txt` dict and returns the stored record."""
+        account = Account.of(account)
+        if account.name in self.records: raise ValueError(f"A character named {account.name} already exists")
+        self._index(account, sort=True)
+        self._touch_account(account)
+        self._emit({"op": "add", "account": account.to_dict()})
+        return account
+
+    def update(self, name, changes):
+        """Updates a record in place, re-indexing it and carrying a rename into favorites and recent."""
+        account = self.records[name]
+        new_name = changes.get("name", name)
+        if new_name != name and new_name in self.records: raise ValueError(f"A character named {new_name} already exists")
+        self._touch_account(account)
+        # `records` is left alone (or rebuilt on a rename) so the record keeps its place in act.txt.
+        self._unindex(account, record=False)
+        account.update(changes)
+        self._index(account, sort=True, record=False)
+        if new_name != name:
+            self.records = {new_name if key == name else key: record for key, record in self.records.items()}
+            if name in self.favorite_set:
+                self.favorites.remove(name); self.favorite_set.discard(name)
+                bisect.insort(self.favorites, new_name); self.favorite_set.add(new_name)
+            self.recent = [new_name if n == name else n for n in self.recent]
+        self._touch_account(account)
+        self._emit({"op": "update", "name": name, "changes": dict(changes)})
+        return account
+
+    def rename(self, name, new_name):
+        return self.update(name, {"name": new_name})
+
+    def delete(self, name):
+        account = self.records[name]
+        self._touch_account(account)
+        self._unindex(account)
+        if name in self.favorite_set:
+            self.favorites.remove(name); self.favorite_set.discard(name)
+        if name in self.recent: self.recent.remove(name)
+        self._emit({"op": "delete", "name": name})
+        return account
+
+    def toggle_favorite(self, name):
+        """Stars or un-stars a character and returns whether it is now a favorite."""
+        if name in self.favorite_set:
+            self.favorites.remove(name); self.favorite_set.discard(name)
+        else:
+            bisect.insort(self.favorites, name); self.favorite_set.add(name)
+        self._touch("Favorites")
+        self._emit({"op": "favorite", "name": name, "on": name in self.favorite_set})
+        return name in self.favorite_set
+
+    def is_favorite(self, name):
+        return name in self.favorite_set
+
+    def touch_recent(self, name):
+        """Moves a character to the front of the recent list, dropping the oldest past the limit."""
+        if name in self.recent: self.recent.remove(name)
+        self.recent.append(name)
+        del self.recent[:-self.recent_limit]
+        self._touch("Recent")
+        self._emit({"op": "recent", "recent": list(self.recent)})
+
+    def apply(self, op):
+        """Replays one journal record. Records that no longer apply are skipped, so replaying a
+        journal over a snapshot that already contains some of its changes is harmless."""
+        kind, name = op.get("op"), op.get("name")
+        if kind == "add":
+            account = op["account"]
+            if account["name"] in self.records: self.update(account["name"], account)
+            else: self.add(account)
+        elif kind == "update":
+            new_name = op["changes"].get("name", name)
+            if name in self.records and (new_name == name or new_name not in self.records): self.update(name, op["changes"])
+        elif kind == "delete":
+            if name in self.records: self.delete(name)
+        elif kind == "favorite":
+            if name in self.records and self.is_favorite(name) != op["on"]: self.toggle_favorite(name)
+        elif kind == "recent":
+            self.recent = [n for n in op["recent"] if n in self.records][-self.recent_limit:]
+            self._touch("Recent")
+
+    # --- Queries ---
+    def class_members(self, eq_class, server="All"):
+        """Returns the characters of a class on a server (or "All"), sorted by name."""
+        return [self.records[name] for name in self._bucket((eq_class, server))]
+
+    def class_count(self, eq_class, server="All"):
+        return len(self.buckets.get((eq_class, server), ()))
+
+    def accounts_on(self, server="All"):
+        if server == "All": return list(self.records.values())
+        return list(self.by_server.get(server, {}).values())
+
+    def favorites_on(self, server="All"):
+        """Returns the favorite characters on a server, sorted by name."""
+        return [self.records[name] for name in self.favorites if server == "All" or self.records[name].server == server]
+
+    def recent_on(self, server="All"):
+        """Returns the recently used characters on a server, most recent first."""
+        return [self.records[name] for name in reversed(self.recent) if server == "All" or self.records[name].server == server]
+
+
+# --- Import / Export ---
+# Rosters move in and out as CSV (with a header row) or JSON Lines, one account per row. Files are
+# read and written a row at a time, so a large roster is never held twice in memory.
+ROSTER_FIELDS = list(Account.FIELDS)
+
+
+def roster_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+class RosterImport:
+    """ Streams accounts from a CSV or JSON Lines file into an AccountStore.
+
+    Rows are validated a batch at a time against the known classes and servers; rows that fail are
+    reported by row number and left out. A name that already exists is skipped, or with
+    `on_duplicate="merge"` the row's non-empty fields are written over the existing character.
+    """
+    VERBATIM_FIELDS = ("username", "password", "note")
+    BATCH = 500
+
+    def __init__(self, store, on_duplicate="skip"):
+        self.store = store
+        self.on_duplicate = on_duplicate
+        self.classes = {eq_class.lower(): eq_class for eq_class in EQ_CLASSES}
+        self.servers = {server.lower(): server for server in AccountStore.SERVERS}
+        self.added, self.merged, self.skipped = [], [], []
+        self.errors = [] # (row number, message)
+
+    @staticmethod
+    def read_rows(f, fmt):
+        """Yields (row number, row dict or None, error) for each row of an open roster file."""
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader: yield reader.line_num, row, None
+            return
+        for number, line in enumerate(f, 1):
+            if not line.strip(): continue
+            try: row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, None, f"not valid JSON ({e.msg})"
+                continue
+            yield (number, row, None) if isinstance(row, dict) else (number, None, "not a JSON object")
+
+    def validate(self, row):
+        """Returns the row's non-empty fields normalized for the store, or raises ValueError.
+        Username, password and note are kept exactly as given, spaces included."""
+        values = {}
+        for key, value in row.items():
+            field = str(key).strip().lower() if key is not None else None
+            if field in ROSTER_FIELDS and value is not None and str(value).strip():
+                values[field] = str(value) if field in self.VERBATIM_FIELDS else str(value).strip()
+        if "name" not in values: raise ValueError("missing name")
+        if "level" in values:
+            try: values["level"] = int(values["level"])
+            except ValueError: raise ValueError(f"level {values['level']!r} is not a number") from None
+        if "class" in values:
+            if values["class"].lower() not in self.classes: raise ValueError(f"unknown class {values['class']!r}")
+            values["class"] = self.classes[values["class"].lower()]
+        if "server" in values:
+            if values["server"].lower() not in self.servers: raise ValueError(f"unknown server {values['server']!r}")
+            values["server"] = self.servers[values["server"].lower()]
+        return values
+
+    def apply_batch(self, batch):
+        checked = []
+        for number, row, error in batch:
+            if error is None:
+                try: row = self.validate(row)
+                except ValueError as e: error = str(e)
+            if error is not None: self.errors.append((number, error))
+            else: checked.append((number, row))
+        for number, values in checked:
+            name = values["name"]
+            if name in self.store:
+                if self.on_duplicate == "merge":
+                    self.store.update(name, values)
+                    self.merged.append(name)
+                else: self.skipped.append(name)
+                continue
+            missing = [field for field in ROSTER_FIELDS[:-1] if field not in values]
+            if missing:
+                self.errors.append((number, "missing " + ", ".join(missing)))
+                continue
+            values.setdefault("note", "")
+            self.store.add({field: values[field] for field in ROSTER_FIELDS})
+            self.added.append(name)
+
+    def run(self, path):
+        """Imports every row of `path` and returns self, for the counts and errors."""
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            batch = []
+            for item in self.read_rows(f, roster_format(path)):
+                batch.append(item)
+                if len(batch) >= self.BATCH:
+                    self.apply_batch(batch)
+                    batch = []
+            self.apply_batch(batch)
+        return self
+
+    def summary(self, max_errors=10):
+        verb = "merged" if self.on_duplicate == "merge" else "skipped"
+        lines = [f"Added {len(self.added)}, {verb} {len(self.merged) + len(self.skipped)} existing, "
+                 f"{len(self.errors)} rows with errors."]
+        lines.extend(f"Row {number}: {message}" for number, message in self.errors[:max_errors])
+        if len(self.errors) > max_errors: lines.append(f"... and {len(self.errors) - max_errors} more")
+        return "\n".join(lines)
+
+
+def export_roster(path, accounts):
+    """Writes accounts to a CSV or JSON Lines file, a row at a time, and returns how many."""
+    count, temp_path = 0, path + ".tmp"
+    with open(temp_path, "w", newline="", encoding="utf-8") as f:
+        if roster_format(path) == "csv":
+            writer = csv.DictWriter(f, fieldnames=ROSTER_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for account in accounts:
+                writer.writerow(account.to_dict())
+                count += 1
+        else:
+            for account in accounts:
+                f.write(json.dumps(account.to_dict()) + "\n")
+                count += 1
+    os.replace(temp_path, path)
+    return count
+
+
+def read_state(path=DATA_FILE):
+    """Returns the state saved in `path`, through its binary cache while that is current ({} if there is no file).
+    Never writes: the cache belongs to the app's writer thread, which may be saving right now."""
+    data = DataWriter.read_cache(path)
+    if data is None:
+        try: data = DataWriter.read_json(path)[0]
+        except FileNotFoundError: return {}
+    return data
+
+
+def load_roster(path=DATA_FILE):
+    """Returns (state, store) for `path` with its journal applied, without starting the GUI."""
+    data = read_state(path)
+    store = AccountStore(data.get("accounts", []), data.get("favorites", []), data.get("recent", []))
+    for op in DataWriter.read_journal(path):
+        if op.get("op") == "settings": data.update({key: value for key, value in op.items() if key != "op"})
+        else: store.apply(op)
+    return data, store
+
+
+def read_accounts(path=DATA_FILE, server=None, eq_class=None):
+    """Returns the characters in `path` as the app would show them, only those on `server` and of
+    `eq_class` if given. Skips the store's indexes unless there is a journal to replay, and builds an
+    Account only for the characters that pass the filters."""
+    if os.path.exists(path + ".log"):
+        return [account for account in load_roster(path)[1].records.values()
+                if server in (None, account.server) and eq_class in (None, account.eq_class)]
+    seen, accounts = set(), []
+    for account in read_state(path).get("accounts", []):
+        # Cached accounts are packed tuples (name, level, server, class, ...); act.txt gives dicts.
+        if isinstance(account, tuple): name, account_server, account_class = account[0], account[2], account[3]
+        else: name, account_server, account_class = account["name"], account["server"], account["class"]
+        if name in seen: continue # A later account reusing a name is shadowed, even when the first is filtered out
+        seen.add(name)
+        if server in (None, account_server) and eq_class in (None, account_class): accounts.append(Account.of(account))
+    return accounts
+
+
+def find_account(path, name):
+    """Looks one account up by its exact name by searching the text of `path` and decoding only
+    that account. Returns None if it isn't found that way (the caller then parses the whole file)."""
+    if os.path.exists(path + ".log"): return None
+    try:
+        with open(path, "r") as f: text = f.read()
+    except FileNotFoundError: return None
+    match = re.search(r'"name":\s*' + re.escape(json.dumps(name)) + r'\s*[,}]', text)
+    if match is None: return None
+    decoder, start = json.JSONDecoder(), match.start()
+    while True:
+        start = text.rfind("{", 0, start)
+        if start < 0: return None
+        try: account = decoder.raw_decode(text, start)[0]
+        except json.JSONDecodeError: continue # a brace inside a string
+        return Account.of(account) if isinstance(account, dict) and account.get("name") == name else None
+
+
+def save_roster(path, data, store):
+    """Writes `store` and the settings in `data` to `path` as one snapshot. Returns the write error, if any."""
+    writer = DataWriter(path)
+    writer.submit({**data, "accounts": [account.to_dict() for account in store.to_list()], "recent": list(store.recent), "favorites": list(store.favorites)})
+    writer.close()
+    return writer.error
+
+
+def run_roster_command(args):
+    """Runs --import / --export against act.txt without opening the window. Returns the exit status."""
+    try: data, store = load_roster(DATA_FILE)
+    except json.JSONDecodeError as e:
+        print(f"{DATA_FILE} could not be read ({e})", file=sys.stderr); return 1
+    status = 0
+    if args.import_file:
+        try: result = RosterImport(store, args.on_duplicate).run(args.import_file)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            print(f"Could not read {args.import_file}: {e}", file=sys.stderr); return 1
+        print(result.summary(max_errors=50))
+        error = save_roster(DATA_FILE, data, store)
+        if error:
+            print(f"Could not save {DATA_FILE}: {error}", file=sys.stderr); return 1
+        if result.errors: status = 2
+    if args.export:
+        try: print(f"Exported {export_roster(args.export, store.records.values())} characters to {args.export}")
+        except OSError as e:
+            print(f"Could not write {args.export}: {e}", file=sys.stderr); return 1
+    return status
+
+def match_choice(value, choices):
+    """Returns the choice equal to `value` ignoring case, or None."""
+    return next((choice for choice in choices if choice.lower() == value.strip().lower()), None)
+
+
+def run_query_command(args):
+    """Answers --get / --list from act.txt without importing Tk. Returns the exit status."""
+    account = find_account(DATA_FILE, args.get) if args.get else None
+    filters = {} if args.get else {"server": None if args.server == "All" else args.server, "eq_class": args.eq_class}
+    try: accounts = read_accounts(DATA_FILE, **filters) if account is None else [account]
+    except json.JSONDecodeError as e:
+        print(f"{DATA_FILE} could not be read ({e})", file=sys.stderr); return 1
+    if args.get:
+        account = next((account for account in accounts if account.name == args.get), None)
+        if account is None:
+            matches = [account for account in accounts if account.name.lower() == args.get.lower()]
+            account = matches[0] if len(matches) == 1 else None
+        if account is None:
+            print(f"No character named {args.get}", file=sys.stderr); return 1
+        if args.json: print(json.dumps(account.to_dict(), indent=4))
+        else: print("\n".join(f"{field}: {account[field]}" for field in ROSTER_FIELDS))
+        return 0
+    class_order = {eq_class: i for i, eq_class in enumerate(EQ_CLASSES)}
+    listed = sorted(accounts, key=lambda account: (class_order.get(account.eq_class, len(class_order)), account.name))
+    if args.json: print(json.dumps([account.to_dict() for account in listed], indent=4))
+    else:
+        for account in listed: print("\t".join(str(account[field]) for field in ROSTER_FIELDS))
+    return 0
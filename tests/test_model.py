@@ -0,0 +1,295 @@
+"""Tests for the account model in roster.py. Nothing here imports Tk, so they run without a display:
+
+    python -m pytest -q        (or: python -m unittest discover tests)
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from roster import (Account, AccountStore, DataWriter, ExternalEdit, RosterImport, export_roster, find_account,
+                    load_roster, read_accounts)
+
+
+def account(name, server="Blue", eq_class="Cleric", level=50, **extra):
+    """An `act.txt` account dict, keys in the order Account.to_dict writes them."""
+    return {"name": name, "level": level, "server": server, "class": eq_class, "username": name.lower(),
+            "password": "pw-" + name, "note": "", **extra}
+
+
+class FileTest(unittest.TestCase):
+    """Gives each test an empty folder and the path of an `act.txt` in it."""
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.path = os.path.join(self.folder, "act.txt")
+
+    def write_state(self, accounts, favorites=(), recent=()):
+        state = {"accounts": accounts, "favorites": list(favorites), "recent": list(recent)}
+        DataWriter.write_atomic(self.path, state)
+        return state
+
+    def write_file(self, name, text):
+        path = os.path.join(self.folder, name)
+        with open(path, "w", newline="", encoding="utf-8") as f: f.write(text)
+        return path
+
+
+# --- Account Records ---
+class AccountPackTest(FileTest):
+    def test_pack_dict_round_trips(self):
+        original = account("Bobbin", note="main", guild="Ex Astra", alt=True)
+        packed = Account.pack_dict(original)
+        self.assertEqual(Account(*packed).pack(), packed)
+        restored = Account(*packed).to_dict()
+        self.assertEqual(restored, original)
+        self.assertEqual(list(restored), list(original)) # extra keys keep their file order
+
+    def test_pack_dict_without_extra_keys(self):
+        self.assertIsNone(Account.pack_dict(account("Bobbin"))[-1])
+
+    def test_pack_dict_fills_missing_optional_fields(self):
+        packed = Account.pack_dict({"name": "Bobbin", "server": "Red", "class": "Monk"})
+        self.assertEqual(packed, ("Bobbin", None, "Red", "Monk", "", "", "", None))
+
+    def test_unknown_class_round_trips(self):
+        original = account("Bobbin", eq_class="Berserker")
+        self.assertEqual(Account.of(original).to_dict(), original)
+
+    def test_cache_round_trips(self):
+        accounts = [account("Bobbin", guild="Ex Astra"), account("Fippy", server="Red", eq_class="Warrior")]
+        state = self.write_state(accounts, favorites=["Fippy"])
+        DataWriter.write_cache(self.path, state, DataWriter.stamp(self.path))
+        cached = DataWriter.read_cache(self.path)
+        self.assertEqual([Account.of(packed).to_dict() for packed in cached["accounts"]], accounts)
+        self.assertEqual(cached["favorites"], ["Fippy"])
+
+    def test_cache_is_stale_after_an_edit(self):
+        state = self.write_state([account("Bobbin")])
+        DataWriter.write_cache(self.path, state, DataWriter.stamp(self.path))
+        self.write_state([account("Bobbin"), account("Fippy")])
+        self.assertIsNone(DataWriter.read_cache(self.path))
+        self.assertIsNotNone(DataWriter.read_cache(self.path, current=False))
+
+
+# --- External Edits ---
+class ExternalEditTest(unittest.TestCase):
+    def setUp(self):
+        self.base = {"accounts": [account("Bobbin"), account("Fippy"), account("Guard")], "favorites": ["Fippy"]}
+        self.store = AccountStore(self.base["accounts"], self.base["favorites"])
+
+    def edit(self, accounts, favorites=("Fippy",), base=True):
+        return ExternalEdit({"accounts": accounts, "favorites": list(favorites)}, self.base if base else None)
+
+    def test_changed_names(self):
+        edit = self.edit([account("Bobbin", level=60), account("Fippy"), account("Newbie")], favorites=["Newbie"])
+        self.assertEqual(edit.changed, {"Bobbin", "Guard", "Newbie"})
+        self.assertEqual(edit.favorites_added, {"Newbie"})
+        self.assertEqual(edit.favorites_removed, {"Fippy"})
+
+    def test_without_base_nothing_is_known_to_be_unchanged(self):
+        self.assertIsNone(self.edit([account("Bobbin")], base=False).changed)
+
+    def test_first_name_wins_and_malformed_accounts_are_skipped(self):
+        edit = self.edit([account("Bobbin"), account("Bobbin", level=1), {"name": "Nameless"}])
+        self.assertEqual(list(edit.accounts), ["Bobbin"])
+        self.assertEqual(edit.accounts["Bobbin"][1], 50)
+        self.assertEqual([packed[1] for packed in edit.shadowed], [1])
+
+    def test_merge_applies_their_changes(self):
+        edit = self.edit([account("Bobbin", level=60), account("Fippy"), account("Newbie", server="Red")], favorites=["Newbie"])
+        changed, conflicts = edit.merge(self.store, set())
+        self.assertEqual(sorted(changed), ["Bobbin", "Guard", "Newbie"])
+        self.assertEqual(conflicts, [])
+        self.assertEqual(self.store.get("Bobbin").level, 60)
+        self.assertNotIn("Guard", self.store)
+        self.assertEqual(self.store.get("Newbie").server, "Red")
+        self.assertEqual(self.store.favorites, ["Newbie"])
+
+    def test_merge_keeps_the_record_objects(self):
+        bobbin = self.store.get("Bobbin")
+        self.edit([account("Bobbin", level=60), account("Fippy"), account("Guard")]).merge(self.store, set())
+        self.assertIs(self.store.get("Bobbin"), bobbin)
+
+    def test_unsaved_change_here_conflicts(self):
+        self.store.update("Bobbin", {"note": "ours"})
+        changed, conflicts = self.edit([account("Bobbin", note="theirs"), account("Fippy"), account("Guard")]).merge(self.store, {"Bobbin"})
+        self.assertEqual((changed, conflicts), ([], ["Bobbin"]))
+        self.assertEqual(self.store.get("Bobbin").note, "ours")
+
+    def test_unsaved_name_unchanged_here_takes_theirs(self):
+        # Changed and changed back here: the file's version wins, as nothing here differs from the base.
+        changed, conflicts = self.edit([account("Bobbin", note="theirs"), account("Fippy"), account("Guard")]).merge(self.store, {"Bobbin"})
+        self.assertEqual((changed, conflicts), (["Bobbin"], []))
+        self.assertEqual(self.store.get("Bobbin").note, "theirs")
+
+    def test_without_base_every_unsaved_difference_conflicts(self):
+        edit = self.edit([account("Bobbin", note="theirs"), account("Fippy"), account("Guard", level=1)], base=False)
+        changed, conflicts = edit.merge(self.store, {"Bobbin"})
+        self.assertEqual((changed, conflicts), (["Guard"], ["Bobbin"]))
+        self.assertEqual(self.store.get("Bobbin").note, "")
+
+    def test_same_change_on_both_sides_is_no_conflict(self):
+        self.store.update("Bobbin", {"level": 60})
+        changed, conflicts = self.edit([account("Bobbin", level=60), account("Fippy"), account("Guard")]).merge(self.store, {"Bobbin"})
+        self.assertEqual((changed, conflicts), ([], []))
+
+    def test_merge_reports_records_before_and_after_they_change(self):
+        seen = []
+        self.edit([account("Bobbin", eq_class="Monk"), account("Fippy"), account("Guard")]).merge(
+            self.store, set(), lambda changed: seen.append((changed.name, changed.eq_class)))
+        self.assertEqual(seen, [("Bobbin", "Cleric"), ("Bobbin", "Monk")])
+
+    def test_merge_replaces_shadowed_accounts(self):
+        self.edit([account("Bobbin"), account("Fippy"), account("Guard"), account("Bobbin", level=1)]).merge(self.store, set())
+        self.assertEqual([shadowed.level for shadowed in self.store.shadowed], [1])
+
+
+# --- Journal ---
+class JournalTest(FileTest):
+    def setUp(self):
+        super().setUp()
+        self.state = self.write_state([account("Bobbin"), account("Fippy"), account("Guard")], favorites=["Guard"])
+        self.store = AccountStore(self.state["accounts"], self.state["favorites"])
+        self.ops = []
+        self.store.listeners.append(self.ops.append)
+
+    def make_changes(self):
+        self.store.add(account("Newbie", server="Red"))
+        self.store.update("Bobbin", {"level": 60, "guild": "Ex Astra"})
+        self.store.rename("Guard", "Sentry")
+        self.store.delete("Fippy")
+        self.store.toggle_favorite("Newbie")
+        self.store.touch_recent("Newbie")
+        self.store.touch_recent("Bobbin")
+
+    def write_journal(self, ops, tail=""):
+        with open(self.path + ".log", "w") as f:
+            f.writelines(json.dumps(op) + "\n" for op in ops)
+            f.write(tail)
+
+    def assertSameStore(self, store, expected):
+        self.assertEqual([record.to_dict() for record in store.to_list()], [record.to_dict() for record in expected.to_list()])
+        self.assertEqual(store.favorites, expected.favorites)
+        self.assertEqual(store.recent, expected.recent)
+
+    def test_replay_rebuilds_the_store(self):
+        self.make_changes()
+        self.write_journal(self.ops)
+        self.assertSameStore(load_roster(self.path)[1], self.store)
+
+    def test_torn_final_record_is_ignored(self):
+        self.make_changes()
+        self.write_journal(self.ops, tail='{"op": "delete", "na')
+        self.assertSameStore(load_roster(self.path)[1], self.store)
+
+    def test_replay_over_a_snapshot_that_has_the_changes(self):
+        self.make_changes()
+        replayed = AccountStore(self.store.to_list(), self.store.favorites, self.store.recent)
+        for op in self.ops: replayed.apply(op)
+        self.assertSameStore(replayed, self.store)
+
+    def test_settings_records_update_the_state(self):
+        self.write_journal([{"op": "settings", "geometry": "300x600"}])
+        data, store = load_roster(self.path)
+        self.assertEqual(data["geometry"], "300x600")
+        self.assertEqual(len(store), 3)
+
+    def test_read_accounts_replays_and_filters(self):
+        self.make_changes()
+        self.write_journal(self.ops)
+        self.assertEqual([record.name for record in read_accounts(self.path, server="Red")], ["Newbie"])
+        self.assertEqual(sorted(record.name for record in read_accounts(self.path)), ["Bobbin", "Newbie", "Sentry"])
+
+
+class ReadAccountsTest(FileTest):
+    def test_filters_and_hides_shadowed_names(self):
+        state = self.write_state([account("Bobbin", server="Red"), account("Fippy"), account("Bobbin", server="Blue")])
+        for cached in (False, True):
+            if cached: DataWriter.write_cache(self.path, state, DataWriter.stamp(self.path))
+            self.assertEqual([record.name for record in read_accounts(self.path, server="Blue")], ["Fippy"])
+            self.assertEqual([record.name for record in read_accounts(self.path, eq_class="Cleric")], ["Bobbin", "Fippy"])
+
+
+# --- Import / Export ---
+class RosterImportTest(FileTest):
+    HEADER = "name,level,server,class,username,password,note\n"
+
+    def run_import(self, text, store=None, on_duplicate="skip", name="in.csv"):
+        store = store if store is not None else AccountStore()
+        return store, RosterImport(store, on_duplicate).run(self.write_file(name, text))
+
+    def test_csv_rows_are_normalized(self):
+        store, result = self.run_import(self.HEADER + "Bobbin, 50 ,green,shadow knight,bob,pw,\n")
+        self.assertEqual((result.added, result.errors), (["Bobbin"], []))
+        self.assertEqual(store.get("Bobbin").to_dict(), {**account("Bobbin", server="Green", eq_class="Shadow Knight"), "username": "bob", "password": "pw"})
+
+    def test_credentials_are_kept_as_given(self):
+        store, result = self.run_import(self.HEADER + 'Bobbin,50,Blue,Cleric, bob ,"pass word ", main box\n')
+        record = store.get("Bobbin")
+        self.assertEqual((record.username, record.password, record.note), (" bob ", "pass word ", " main box"))
+
+    def test_bad_rows_are_reported_by_row_number(self):
+        _, result = self.run_import(self.HEADER + "\n".join(["Bobbin,50,Blue,Cleric,bob,pw,",
+                                                             "Fippy,x,Blue,Cleric,fip,pw,",
+                                                             "Guard,50,Purple,Cleric,g,pw,",
+                                                             "Newbie,50,Blue,Berserker,n,pw,",
+                                                             ",50,Blue,Cleric,n,pw,",
+                                                             "Sentry,50,Blue,Cleric,,pw,"]) + "\n")
+        self.assertEqual(result.added, ["Bobbin"])
+        self.assertEqual([number for number, _ in result.errors], [3, 4, 5, 6, 7])
+        self.assertEqual(result.errors[-1], (7, "missing username"))
+
+    def test_duplicates_are_skipped_or_merged(self):
+        row = self.HEADER + "Bobbin,60,,,,,new note\n"
+        store, result = self.run_import(row, AccountStore([account("Bobbin")]))
+        self.assertEqual((result.skipped, store.get("Bobbin").level), (["Bobbin"], 50))
+        store, result = self.run_import(row, AccountStore([account("Bobbin")]), on_duplicate="merge")
+        self.assertEqual(result.merged, ["Bobbin"])
+        self.assertEqual(store.get("Bobbin").to_dict(), account("Bobbin", level=60, note="new note")) # empty fields left alone
+
+    def test_json_lines(self):
+        text = "\n".join([json.dumps(account("Bobbin")), "", "{not json", "[1, 2]", json.dumps(account("Fippy", level="7"))]) + "\n"
+        store, result = self.run_import(text, name="in.jsonl")
+        self.assertEqual(result.added, ["Bobbin", "Fippy"])
+        self.assertEqual([number for number, _ in result.errors], [3, 4])
+        self.assertEqual(store.get("Fippy").level, 7)
+
+    def test_export_then_import_round_trips(self):
+        accounts = [account("Bobbin", note="main, with comma"), account("Fippy", server="Red", eq_class="Warrior", level=1)]
+        for name in ("out.csv", "out.jsonl"):
+            path = os.path.join(self.folder, name)
+            self.assertEqual(export_roster(path, AccountStore(accounts).records.values()), 2)
+            store = AccountStore()
+            RosterImport(store).run(path)
+            self.assertEqual([record.to_dict() for record in store.to_list()], accounts)
+
+
+# --- Lookup ---
+class FindAccountTest(FileTest):
+    def test_finds_the_exact_name(self):
+        self.write_state([account("Bob"), account("Bobbin", note="main")])
+        self.assertEqual(find_account(self.path, "Bobbin").to_dict(), account("Bobbin", note="main"))
+        self.assertEqual(find_account(self.path, "Bob").name, "Bob")
+        self.assertIsNone(find_account(self.path, "Bo"))
+
+    def test_names_that_need_escaping(self):
+        self.write_state([account('Bob "the" \\ Builder')])
+        self.assertEqual(find_account(self.path, 'Bob "the" \\ Builder').name, 'Bob "the" \\ Builder')
+
+    def test_brace_inside_a_string_before_the_name(self):
+        self.write_state([{"note": "a { b", "name": "Bobbin", "server": "Blue", "class": "Cleric"}])
+        self.assertEqual(find_account(self.path, "Bobbin").note, "a { b")
+
+    def test_gives_up_when_a_journal_or_file_is_missing(self):
+        self.assertIsNone(find_account(self.path, "Bobbin"))
+        self.write_state([account("Bobbin")])
+        self.write_file("act.txt.log", "")
+        self.assertIsNone(find_account(self.path, "Bobbin"))
+
+
+if __name__ == "__main__":
+    unittest.main()
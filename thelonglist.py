@@ -1,45 +1,809 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
-from tkinter.font import Font
+import argparse
+import bisect
+import csv
+import functools
+import heapq
+import itertools
 import json
 import os
 import platform
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
 
-# A helper class to create simple tooltips that appear when hovering over a widget.
+# The model and command-line layer is imported from a module so it is cached as bytecode (see roster.py).
+from roster import (DATA_FILE, EQ_CLASSES, AccountStore, DataWriter, ExternalEdit, InstanceLock, RosterImport,
+                    SearchIndex, export_roster, match_choice, run_query_command, run_roster_command)
+
+STARTUP_TIME = time.perf_counter()
+PLATFORM = platform.system() # asked once; the wheel handler needs it on every tick
+
+# Tk is only imported once the window is needed (see load_tk), so the command-line modes start fast.
+tk = ttk = messagebox = filedialog = Font = None
+
+def load_tk():
+    """Imports tkinter into this module on first use and returns it."""
+    global tk, ttk, messagebox, filedialog, Font
+    if tk is None:
+        import tkinter
+        from tkinter import ttk, messagebox, filedialog
+        from tkinter.font import Font
+        tk = tkinter
+    return tk
+
+
+# One tooltip window shared by everything that shows tips. It is created on first use and then only
+# re-texted, moved, shown and withdrawn.
 class ToolTip:
-    """ Create a tooltip for a given widget. """
-    def __init__(self, widget, text):
-        self.widget = widget
-        self.text = text
-        self.tooltip_window = None
-        self.widget.bind("<Enter>", self.show_tip)
-        self.widget.bind("<Leave>", self.hide_tip)
-
-    def show_tip(self, event=None):
-        x, y, _, _ = self.widget.bbox("insert")
-        x += self.widget.winfo_rootx() + 25
-        y += self.widget.winfo_rooty() + 20
-        
-        self.tooltip_window = tk.Toplevel(self.widget)
-        self.tooltip_window.wm_overrideredirect(True)
-        self.tooltip_window.attributes("-topmost", True) # Ensure tooltip is on top
-        self.tooltip_window.wm_geometry(f"+{x}+{y}")
-        
-        label = tk.Label(self.tooltip_window, text=self.text, justify='left',
-                         background="#ffffe0", relief='solid', borderwidth=1,
-                         font=("tahoma", "8", "normal"))
-        label.pack(ipadx=2)
+    """ A single reusable tooltip that appears after the pointer rests on a target. """
+    DELAY_MS = 400
+
+    def __init__(self, master, delay_ms=DELAY_MS):
+        self.master = master
+        self.delay_ms = delay_ms
+        self.window = self.label = None
+        self.owner = None # the row (or other object) the pending or visible tip belongs to
+        self.job = None
+
+    def schedule(self, owner, text, x, y):
+        """Shows `text` at screen position (x, y) after the hover delay, unless already shown for `owner`."""
+        if owner is self.owner: return
+        self.hide()
+        self.owner = owner
+        self.job = self.master.after(self.delay_ms, lambda: self.show(text, x, y))
+
+    def show(self, text, x, y):
+        self.job = None
+        if self.window is None:
+            self.window = tk.Toplevel(self.master)
+            self.window.wm_overrideredirect(True)
+            self.window.attributes("-topmost", True) # Ensure tooltip is on top
+            self.label = tk.Label(self.window, justify='left', background="#ffffe0", relief='solid', borderwidth=1,
+                                  font=("tahoma", "8", "normal"))
+            self.label.pack(ipadx=2)
+        self.label.config(text=text)
+        self.window.wm_geometry(f"+{x}+{y}")
+        self.window.deiconify()
+        self.window.lift()
+
+    def hide(self):
+        if self.owner is None: return
+        self.owner = None
+        if self.job is not None: self.master.after_cancel(self.job)
+        self.job = None
+        if self.window is not None: self.window.withdraw()
+
+
+# --- Frame Scheduling ---
+class FrameScheduler:
+    """ Collects dirty flags from scroll, resize and data events and handles them together, at most once a frame.
+
+    `handlers` maps each flag to a callback taking the set of details marked with it (e.g. section
+    ids). Flags are handled in ORDER, so a data change is laid out before rows are re-fitted and
+    rendered; a handler may mark a later flag and have it handled in the same pass.
+    """
+    FRAME_MS = 16
+    ORDER = ("data", "layout", "truncation", "scrollregion", "render")
+
+    def __init__(self, master, handlers):
+        self.master = master
+        self.handlers = handlers
+        self.dirty = {}
+        self.job = None
+        self.flushing = False
+        self.last_flush = 0.0
+        self.marks = self.flushes = 0
+
+    def mark(self, flag, *details):
+        self.marks += 1
+        self.dirty.setdefault(flag, set()).update(details)
+        if self.job is None and not self.flushing: self._schedule()
+
+    def _schedule(self):
+        wait = self.FRAME_MS - 1000 * (time.perf_counter() - self.last_flush)
+        self.job = self.master.after(int(wait) + 1, self.flush) if wait > 0 else self.master.after_idle(self.flush)
+
+    def flush(self):
+        """Handles everything marked so far now, e.g. before reading positions off the list."""
+        if self.job is not None: self.master.after_cancel(self.job)
+        self.job = None
+        if not self.dirty or self.flushing: return
+        self.flushing = True
+        try:
+            for flag in self.ORDER:
+                details = self.dirty.pop(flag, None)
+                if details is not None: self.handlers[flag](details)
+        finally:
+            self.flushing = False
+            self.flushes += 1
+            self.last_flush = time.perf_counter()
+        if self.dirty: self._schedule() # marked by a handler for an earlier flag
+
+
+# --- Instrumentation ---
+class PerfRecorder:
+    """ Records durations and call counts of instrumented functions.
+
+    Nothing is wrapped unless instrumentation is enabled (`--perf` or the P99_PERF environment
+    variable), so it costs nothing when off. Each call is kept in a fixed-size ring buffer, and
+    running totals are kept per function.
+    """
+    def __init__(self, capacity=10000):
+        self.samples = deque(maxlen=capacity)
+        self.stats = {}
+        self.started = time.perf_counter()
+
+    @staticmethod
+    def enabled_by_env():
+        return os.environ.get("P99_PERF", "") not in ("", "0")
+
+    def wrap(self, name, function):
+        samples, stats, clock = self.samples, self.stats, time.perf_counter
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                duration = (clock() - start) * 1000
+                samples.append((name, start, duration))
+                entry = stats.get(name)
+                if entry is None: stats[name] = [1, duration, duration]
+                else:
+                    entry[0] += 1; entry[1] += duration
+                    if duration > entry[2]: entry[2] = duration
+        return timed
+
+    def install(self, owner, names, prefix=""):
+        """Replaces `owner.<name>` with a timed wrapper for each name (on an instance or a class)."""
+        for name in names:
+            setattr(owner, name, self.wrap(prefix + name, getattr(owner, name)))
+
+    def summary(self):
+        """Returns {name: {count, total_ms, mean_ms, max_ms}}, slowest in total first."""
+        rows = sorted(self.stats.items(), key=lambda item: -item[1][1])
+        return {name: {"count": count, "total_ms": round(total, 3), "mean_ms": round(total / count, 3), "max_ms": round(worst, 3)}
+                for name, (count, total, worst) in rows}
+
+    def dump(self, path, extra):
+        report = {"summary": self.summary(), **extra,
+                  "samples": [[name, round((start - self.started) * 1000, 3), round(duration, 3)] for name, start, duration in self.samples]}
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+
+
+# --- Text Truncation ---
+class TextTruncator:
+    """ Fits label text to a pixel width, ending it with "..." when it does not fit.
+
+    Measured widths live in a bounded LRU cache keyed by font and string, the cut point is found by
+    binary search, and each label remembers what it was last fitted to so unchanged labels are skipped.
+    """
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self.widths = OrderedDict()
+        self.fitted = {}
+        self.measure_calls = 0
+
+    def measure(self, font, text):
+        key = (font.name, text)
+        width = self.widths.get(key)
+        if width is None:
+            self.measure_calls += 1
+            width = self.widths[key] = font.measure(text)
+            if len(self.widths) > self.max_entries: self.widths.popitem(last=False)
+        else: self.widths.move_to_end(key)
+        return width
+
+    def truncate(self, full_text, max_width, font):
+        """Returns the longest prefix of `full_text` plus "..." that fits in `max_width` pixels."""
+        if self.measure(font, full_text) <= max_width: return full_text
+        low, high = 0, len(full_text) - 1 # Invariant: the best cut point lies in [low, high].
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.measure(font, full_text[:middle] + "...") <= max_width: low = middle
+            else: high = middle - 1
+        return full_text[:low] + "..."
+
+    def fit(self, label, full_text, max_width, font):
+        """Sets a label's text to `full_text` truncated to `max_width`, unless it already is."""
+        memo = (full_text, max_width, font.name)
+        if self.fitted.get(label) == memo: return
+        self.fitted[label] = memo
+        label.config(text=full_text if max_width < 20 else self.truncate(full_text, max_width, font))
+
+    def clear(self, label):
+        """Blanks a label, forgetting what it was fitted to so the next fit always sets it."""
+        self.fitted.pop(label, None)
+        label.config(text="")
+
+
+# --- Virtualized List ---
+# The list is an ordered sequence of sections (Recent, Favorites, one per class), each a list of
+# `(key, kind, data)` rows. Only the rows in or near the viewport are materialized, using row slots
+# recycled from a pool per kind. A bound slot is rebound only when its row's signature changes, so
+# updating one section costs work proportional to that section and the visible rows.
+class ListSection:
+    """ The laid-out rows of one section, with offsets relative to the section's top. """
+    def __init__(self, rows, offsets, height):
+        self.rows = rows
+        self.offsets = offsets
+        self.height = height
+        self.index = {row[0]: i for i, row in enumerate(rows)}
+
+
+class SectionCache:
+    """ Laid-out sections kept for reuse, each stamped with the store version it was built from.
+
+    The least recently used sections are evicted once the cache holds more than `max_rows` rows.
+    """
+    def __init__(self, max_rows):
+        self.max_rows = max_rows
+        self.entries = OrderedDict()
+        self.rows = 0
+        self.hits = self.misses = 0
+
+    def get(self, key, version):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, version, section):
+        self.discard(key)
+        if len(section.rows) > self.max_rows: return
+        self.entries[key] = (version, section)
+        self.rows += len(section.rows)
+        while self.rows > self.max_rows:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.rows -= len(evicted.rows)
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None: self.rows -= len(entry[1].rows)
+
+    def clear(self):
+        self.entries.clear()
+        self.rows = 0
+
+
+class VirtualList:
+    """ Lays sections of rows out on a canvas and materializes only those near the viewport. """
+    def __init__(self, canvas, app, slot_classes, overscan=300):
+        self.canvas = canvas
+        self.app = app
+        self.slot_classes = slot_classes
+        self.overscan = overscan
+        self.section_ids = []
+        self.sections = {}
+        self.starts = []
+        self.total_height = 0
+        self.width = 1
+        self.pools = {kind: [] for kind in slot_classes}
+        self.slots = []
+        self.bound = {}
+        self.by_identity = {}
+        self.heights = {}
+
+    def set_sections(self, sections):
+        """Replaces the whole list with an ordered list of `(section_id, ListSection)` pairs."""
+        self.section_ids = [section_id for section_id, _ in sections]
+        self.sections = dict(sections)
+        self._relayout()
+        self.render()
+
+    def update_sections(self, changes):
+        """Swaps in the changed sections ({section_id: ListSection}) and reconciles the visible rows.
+
+        Sections that end above the viewport shift the view by their change in height, so the
+        rows the user is looking at stay where they are.
+        """
+        view_top = self.canvas.canvasy(0)
+        shift = 0
+        for section_id, new in changes.items():
+            old = self.sections[section_id]
+            if self.start_of(section_id) + old.height <= view_top: shift += new.height - old.height
+            self.sections[section_id] = new
+        self._relayout()
+        if shift and self.total_height > 0: self.canvas.yview_moveto((view_top + shift) / self.total_height)
+        self.render()
+
+    def layout(self, rows):
+        """Lays out `(key, kind, data)` rows as a ListSection."""
+        offsets, y = [], 0
+        for _, kind, data in rows:
+            offsets.append(y)
+            y += self.row_height(kind, data)
+        return ListSection(rows, offsets, y)
+
+    def _relayout(self):
+        self.starts, y = [], 0
+        for section_id in self.section_ids:
+            self.starts.append(y)
+            y += self.sections[section_id].height
+        self.total_height = y
+        self.sync_scrollregion() # right away: callers move the view as a fraction of it
+
+    def row_height(self, kind, data):
+        """Returns the outer height of a row, measuring each layout variant only once."""
+        slot_cls = self.slot_classes[kind]
+        variant = (kind, slot_cls.variant(data))
+        if variant not in self.heights:
+            slot = self._acquire(kind)
+            slot.bind(data)
+            self.heights[variant] = slot.pad_top + slot.measure() + slot.pad_bottom
+            self._release(slot)
+        return self.heights[variant]
+
+    def start_of(self, section_id):
+        return self.starts[self.section_ids.index(section_id)]
+
+    def offset_of(self, key, section_id):
+        section = self.sections.get(section_id)
+        if section is None or key not in section.index: return None
+        return self.start_of(section_id) + section.offsets[section.index[key]]
+
+    def set_width(self, width):
+        """Resizes every slot to the new canvas width. The bound rows still need re-fitting
+        (see fit_all) and the scroll region updating (see sync_scrollregion)."""
+        self.width = width
+        for slot in self.slots: slot.set_width(max(width - 2 * slot.pad_x, 1))
+
+    def sync_scrollregion(self):
+        self.canvas.configure(scrollregion=(0, 0, self.width, self.total_height))
+
+    def fit_all(self):
+        for slot in self.bound.values(): slot.fit(self.width - 2 * slot.pad_x)
+
+    def rows_of(self, identity):
+        """Returns the bound slots currently showing the given record identity."""
+        return self.by_identity.get(identity, ())
+
+    def fit(self, slot):
+        slot.fit(self.width - 2 * slot.pad_x)
+
+    def visible_rows(self):
+        """Returns {key: (y, kind, data)} for the rows intersecting the viewport plus overscan."""
+        top = self.canvas.canvasy(0)
+        low, high = top - self.overscan, top + self.canvas.winfo_height() + self.overscan
+        visible = {}
+        i = max(bisect.bisect_right(self.starts, low) - 1, 0)
+        while i < len(self.section_ids) and self.starts[i] < high:
+            section, start = self.sections[self.section_ids[i]], self.starts[i]
+            j = max(bisect.bisect_right(section.offsets, low - start) - 1, 0)
+            while j < len(section.rows) and start + section.offsets[j] < high:
+                key, kind, data = section.rows[j]
+                visible[key] = (start + section.offsets[j], kind, data)
+                j += 1
+            i += 1
+        return visible
+
+    def render(self):
+        """Reconciles the bound slots with the rows intersecting the viewport."""
+        visible = self.visible_rows()
+        for key in [key for key in self.bound if key not in visible]: self._release(self.bound.pop(key))
+        for key, (y, kind, data) in visible.items():
+            slot = self.bound.get(key)
+            if slot is None:
+                slot = self.bound[key] = self._acquire(kind)
+                slot.key = key
+            signature = slot.signature(self.app, data)
+            if slot.bound_signature != signature:
+                slot.bind(data)
+                slot.fit(self.width - 2 * slot.pad_x)
+                slot.bound_signature = signature
+                if slot.identity is not None: self.by_identity.setdefault(slot.identity, set()).add(slot)
+            if slot.y != y:
+                slot.place(y + slot.pad_top)
+                if slot.y is None: slot.show()
+                slot.y = y
+
+    def _acquire(self, kind):
+        pool = self.pools[kind]
+        if pool: return pool.pop()
+        slot = self.slot_classes[kind](self.app, self.canvas)
+        slot.key, slot.y, slot.bound_signature, slot.identity = None, None, None, None
+        slot.set_width(max(self.width - 2 * slot.pad_x, 1))
+        self.slots.append(slot)
+        return slot
+
+    def _release(self, slot):
+        if slot.identity is not None:
+            rows = self.by_identity.get(slot.identity)
+            if rows is not None:
+                rows.discard(slot)
+                if not rows: del self.by_identity[slot.identity]
+        slot.key, slot.y, slot.bound_signature, slot.identity = None, None, None, None
+        slot.hide()
+        self.pools[slot.kind].append(slot)
+
+
+# --- Row Slots ---
+# A slot draws one row and is recycled between rows of its kind. Besides `bind(data)` and
+# `fit(width)`, each slot can be placed, shown, hidden, resized and measured by the VirtualList.
+class WidgetRow:
+    """ Base for rows built from real widgets, embedded in the canvas as a window item. """
+    pad_x, pad_top, pad_bottom = 0, 0, 0
+    BINDTAG = "ListRow" # the app binds this tag once instead of binding every row widget
+
+    def delegate(self, app, role, *widgets):
+        """Routes the widgets' events to the app's list dispatcher, which maps them back to this row."""
+        for widget in widgets:
+            widget.bindtags((self.BINDTAG,) + tuple(widget.bindtags()))
+            app.row_widgets[str(widget)] = (self, role)
+
+    def embed(self, canvas):
+        self.canvas = canvas
+        self.item = canvas.create_window(self.pad_x, 0, window=self.frame, anchor='nw', state='hidden')
+
+    def place(self, y):
+        self.canvas.coords(self.item, self.pad_x, y)
+
+    def show(self):
+        self.canvas.itemconfigure(self.item, state='normal')
+
+    def hide(self):
+        self.canvas.itemconfigure(self.item, state='hidden')
+
+    def set_width(self, width):
+        self.canvas.itemconfigure(self.item, width=width)
+
+    def measure(self):
+        self.frame.update_idletasks()
+        return self.frame.winfo_reqheight()
+
+
+class SectionRow(WidgetRow):
+    """ A "Recent" / "Favorites" section title. Data: (text, color, top_padding). """
+    kind = 'section'
+    pad_x, pad_top, pad_bottom = 0, 0, 0
+
+    def __init__(self, app, parent):
+        self.frame = tk.Frame(parent, bg='#2c2c2c')
+        self.label = tk.Label(self.frame, font=app.fonts['section'], bg='#2c2c2c')
+        self.label.pack(anchor='w', pady=(0, 8))
+        self.delegate(app, 'section', self.frame, self.label)
+        self.embed(parent)
+
+    @staticmethod
+    def variant(data):
+        return data[2]
+
+    @staticmethod
+    def signature(app, data):
+        return data
+
+    def bind(self, data):
+        text, color, top = data
+        self.label.config(text=text, fg=color)
+        self.label.pack_configure(pady=(top, 8))
+
+    def fit(self, width):
+        pass
+
+
+class ClassHeaderRow(WidgetRow):
+    """ A collapsible class header. Data: (eq_class, count, is_expanded). """
+    kind = 'class'
+    pad_x, pad_top, pad_bottom = 0, 10, 2
+
+    def __init__(self, app, parent):
+        self.eq_class = None
+        self.frame = tk.Frame(parent, bg='#2c2c2c')
+        self.label = tk.Label(self.frame, font=app.fonts['class'], bg='#2c2c2c', cursor="hand2")
+        self.label.pack(anchor='w')
+        self.delegate(app, 'class', self.frame, self.label)
+        self.embed(parent)
+
+    @staticmethod
+    def variant(data):
+        return None
+
+    @staticmethod
+    def signature(app, data):
+        return data
+
+    def bind(self, data):
+        self.eq_class, count, is_expanded = data
+        arrow = "▼" if is_expanded else "▶"
+        fg_color = '#ffffff' if count else '#666666'
+        self.label.config(text=f"{arrow} {self.eq_class} ({count})", fg=fg_color)
+
+    def fit(self, width):
+        pass
+
+
+class CharacterRow(WidgetRow):
+    """ A recycled character entry. Data: (character, is_recent). """
+    kind = 'char'
+    pad_x, pad_top, pad_bottom = 5, 3, 3
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.character = None
+        self.selected = False
+        self.frame = tk.Frame(parent, bg='#404040', relief='solid', bd=1)
+        self.info_line = tk.Frame(self.frame, bg='#404040')
+        self.info_line.pack(fill='x', padx=8, pady=(5,0))
+        self.info_line.grid_columnconfigure(0, weight=1); self.info_line.grid_columnconfigure(1, weight=0)
+        self.char_label = tk.Label(self.info_line, font=app.fonts['char'], bg='#404040', fg='white', anchor='w')
+        self.char_label.grid(row=0, column=0, sticky='ew')
+        self.right_panel = tk.Frame(self.info_line, bg='#404040')
+        self.right_panel.grid(row=0, column=1, sticky='e', padx=(10, 0))
+        self.server_label = tk.Label(self.right_panel, font=app.fonts['server'], bg='#404040', anchor='e')
+        self.server_label.pack(anchor='e')
+        self.star_label = tk.Label(self.right_panel, font=app.fonts['star'], bg='#404040', cursor="hand2")
+        self.star_label.pack(anchor='e', pady=(2, 0))
+        self.star_tip = ""
+        self.note_label = tk.Label(self.frame, font=app.fonts['note'], bg='#404040', fg='#ccc', anchor='w')
+        self.cred_container = tk.Frame(self.frame, bg='#404040', height=65)
+        self.cred_container.pack(fill='x', padx=8, pady=(5,5)); self.cred_container.pack_propagate(False)
+        self.user_label = tk.Label(self.cred_container, font=app.fonts['cred'], bg='#404040', fg='white', anchor='w')
+        self.user_label.pack(fill='x')
+        self.pass_label = tk.Label(self.cred_container, font=app.fonts['cred'], bg='#404040', fg='white', anchor='w')
+        self.pass_label.pack(fill='x')
+        widgets = [self.frame, self.info_line, self.char_label, self.server_label, self.cred_container,
+                   self.user_label, self.pass_label, self.right_panel, self.note_label]
+        for widget in widgets: widget.configure(cursor="hand2")
+        self.delegate(app, 'char', *widgets)
+        self.delegate(app, 'star', self.star_label)
+        self.embed(parent)
+
+    @staticmethod
+    def variant(data):
+        return bool(data[0].note)
+
+    @staticmethod
+    def signature(app, data):
+        character, is_recent = data
+        return (character.name, character.level, character.class_code, character.server_code, character.username,
+                character.password, character.note, is_recent, app.store.is_favorite(character.name))
+
+    def bind(self, data):
+        character, is_recent = data
+        self.character = character
+        self.identity = id(character)
+        self.full_text_char = f"{character.name} - {character.eq_class} (Lvl {character.level})" if is_recent else f"{character.name} (Lvl {character.level})"
+        self.full_text_note = character.note
+        self.full_text_user = f"User: {character.username}"; self.full_text_pass = f"Pass: {character.password}"
+        self.server_label.config(text=character.server, fg=self.app.server_colors.get(character.server, '#ffffff'))
+        is_fav = self.app.store.is_favorite(character.name)
+        star_char, star_color = ("★", "#ffd700") if is_fav else ("☆", "#999999")
+        self.star_label.config(text=star_char, fg=star_color)
+        self.star_tip = "Remove from favorites" if is_fav else "Add to favorites"
+        if self.full_text_note: self.note_label.pack(fill='x', padx=8, before=self.cred_container)
+        else: self.note_label.pack_forget()
+        self.paint(self.app.is_selected(character))
+
+    def paint(self, is_selected):
+        """Applies the selected or normal colors and fonts to the row."""
+        self.selected = is_selected
+        bg_color = '#005a9e' if is_selected else '#404040'
+        self.font_char = self.app.fonts['char_bold'] if is_selected else self.app.fonts['char']
+        self.font_cred = self.app.fonts['cred_big'] if is_selected else self.app.fonts['cred']
+        for widget in [self.frame, self.info_line, self.cred_container, self.right_panel, self.server_label, self.star_label]:
+            widget.config(bg=bg_color)
+        self.char_label.config(font=self.font_char, bg=bg_color, fg='#ffffff')
+        self.user_label.config(font=self.font_cred, bg=bg_color, fg=('#ffffff' if is_selected else '#aaaaaa'))
+        self.pass_label.config(font=self.font_cred, bg=bg_color, fg=('#ffffff' if is_selected else '#aaaaaa'))
+        self.note_label.config(bg=bg_color, fg=('#e0e0e0' if is_selected else '#aaaaaa'))
+
+    def fit(self, width):
+        """Truncates the row's labels to fit a row of the given outer width."""
+        inner_width = width - 2 - 16
+        right_width = 10 + max(self.app.truncator.measure(self.app.fonts['server'], self.character.server), 16)
+        self.app._truncate_text(self.char_label, self.full_text_char, inner_width - right_width - 20, self.font_char)
+        if self.full_text_note: self.app._truncate_text(self.note_label, self.full_text_note, width - 2 - 20, self.app.fonts['note'])
+        self.app._truncate_text(self.user_label, self.full_text_user, inner_width - 10, self.font_cred)
+        self.app._truncate_text(self.pass_label, self.full_text_pass, inner_width - 10, self.font_cred)
+
+
+# --- Canvas Item Rows ---
+# A lighter alternative to the widget rows (`--renderer canvas`): each row is a handful of canvas
+# text and rectangle items sharing a per-row tag. Clicks and tooltips are resolved by the app from
+# the tags of the item under the pointer.
+class CanvasText:
+    """ Lets TextTruncator fit a canvas text item the same way it fits a Label. """
+    __slots__ = ("canvas", "item")
+
+    def __init__(self, canvas, item):
+        self.canvas = canvas
+        self.item = item
+
+    def config(self, text):
+        self.canvas.itemconfigure(self.item, text=text)
+
+
+class CanvasRow:
+    """ Base for rows drawn as canvas items tagged with a per-row tag. """
+    pad_x, pad_top, pad_bottom = 0, 0, 0
+    row_ids = itertools.count()
+
+    def __init__(self, app, canvas):
+        self.app = app
+        self.canvas = canvas
+        self.tag = f"row{next(CanvasRow.row_ids)}"
+        self.top = 0
+        self.width = 1
+        app.canvas_rows[self.tag] = self
+
+    def text_item(self, font, anchor='nw', fill='white', tags=()):
+        return self.canvas.create_text(0, 0, anchor=anchor, font=font, fill=fill, tags=(self.tag,) + tags, state='hidden')
+
+    def place(self, y):
+        self.canvas.move(self.tag, 0, y - self.top)
+        self.top = y
+
+    def show(self):
+        self.canvas.itemconfigure(self.tag, state='normal')
 
-    def hide_tip(self, event=None):
-        if self.tooltip_window:
-            self.tooltip_window.destroy()
-        self.tooltip_window = None
+    def hide(self):
+        self.canvas.itemconfigure(self.tag, state='hidden')
+
+    def set_width(self, width):
+        self.width = width
+        self.layout()
+
+    def linespace(self, font):
+        return self.app.linespace(font)
+
+
+class CanvasSectionRow(CanvasRow):
+    """ Canvas version of SectionRow. """
+    kind = 'section'
+    variant, signature = staticmethod(SectionRow.variant), staticmethod(SectionRow.signature)
+
+    def __init__(self, app, canvas):
+        super().__init__(app, canvas)
+        self.text = self.text_item(app.fonts['section'])
+        self.top_padding = 0
+
+    def bind(self, data):
+        text, color, self.top_padding = data
+        self.canvas.itemconfigure(self.text, text=text, fill=color)
+        self.layout()
+
+    def layout(self):
+        self.canvas.coords(self.text, self.pad_x + 2, self.top + self.top_padding + 2)
+
+    def measure(self):
+        return self.top_padding + self.linespace(self.app.fonts['section']) + 4 + 8
+
+    def fit(self, width):
+        pass
+
+
+class CanvasClassHeaderRow(CanvasRow):
+    """ Canvas version of ClassHeaderRow. """
+    kind = 'class'
+    pad_x, pad_top, pad_bottom = ClassHeaderRow.pad_x, ClassHeaderRow.pad_top, ClassHeaderRow.pad_bottom
+    variant, signature = staticmethod(ClassHeaderRow.variant), staticmethod(ClassHeaderRow.signature)
+
+    def __init__(self, app, canvas):
+        super().__init__(app, canvas)
+        self.eq_class = None
+        self.text = self.text_item(app.fonts['class'])
+
+    def bind(self, data):
+        self.eq_class, count, is_expanded = data
+        arrow = "▼" if is_expanded else "▶"
+        self.canvas.itemconfigure(self.text, text=f"{arrow} {self.eq_class} ({count})", fill='#ffffff' if count else '#666666')
+        self.layout()
+
+    def layout(self):
+        self.canvas.coords(self.text, self.pad_x + 2, self.top + 2)
+
+    def measure(self):
+        return self.linespace(self.app.fonts['class']) + 4
+
+    def fit(self, width):
+        pass
+
+
+class CanvasCharacterRow(CanvasRow):
+    """ Canvas version of CharacterRow, laid out to match its frames and labels. """
+    kind = 'char'
+    pad_x, pad_top, pad_bottom = CharacterRow.pad_x, CharacterRow.pad_top, CharacterRow.pad_bottom
+    variant, signature = staticmethod(CharacterRow.variant), staticmethod(CharacterRow.signature)
+
+    def __init__(self, app, canvas):
+        super().__init__(app, canvas)
+        self.character = None
+        self.selected = False
+        self.height = 0
+        fonts = app.fonts
+        self.rect = canvas.create_rectangle(0, 0, 0, 0, fill='#404040', outline='#000000', tags=(self.tag,), state='hidden')
+        self.char_text = self.text_item(fonts['char'])
+        self.server_text = self.text_item(fonts['server'], anchor='ne')
+        self.star_text = self.text_item(fonts['star'], anchor='ne', tags=('star',))
+        self.note_text = self.text_item(fonts['note'], fill='#ccc')
+        self.user_text = self.text_item(fonts['cred'])
+        self.pass_text = self.text_item(fonts['cred'])
+        self.char_label, self.note_label = CanvasText(canvas, self.char_text), CanvasText(canvas, self.note_text)
+        self.user_label, self.pass_label = CanvasText(canvas, self.user_text), CanvasText(canvas, self.pass_text)
+
+    def bind(self, data):
+        character, is_recent = data
+        self.character = character
+        self.identity = id(character)
+        self.full_text_char = f"{character.name} - {character.eq_class} (Lvl {character.level})" if is_recent else f"{character.name} (Lvl {character.level})"
+        self.full_text_note = character.note
+        self.full_text_user = f"User: {character.username}"; self.full_text_pass = f"Pass: {character.password}"
+        self.canvas.itemconfigure(self.server_text, text=character.server, fill=self.app.server_colors.get(character.server, '#ffffff'))
+        is_fav = self.app.store.is_favorite(character.name)
+        star_char, star_color = ("★", "#ffd700") if is_fav else ("☆", "#999999")
+        self.canvas.itemconfigure(self.star_text, text=star_char, fill=star_color)
+        self.star_tip = "Remove from favorites" if is_fav else "Add to favorites"
+        if not self.full_text_note: self.app.truncator.clear(self.note_label)
+        self.paint(self.app.is_selected(character))
+
+    def paint(self, is_selected):
+        """Applies the selected or normal colors and fonts to the row."""
+        self.selected = is_selected
+        self.font_char = self.app.fonts['char_bold'] if is_selected else self.app.fonts['char']
+        self.font_cred = self.app.fonts['cred_big'] if is_selected else self.app.fonts['cred']
+        cred_color = '#ffffff' if is_selected else '#aaaaaa'
+        self.canvas.itemconfigure(self.rect, fill='#005a9e' if is_selected else '#404040')
+        self.canvas.itemconfigure(self.char_text, font=self.font_char)
+        self.canvas.itemconfigure(self.user_text, font=self.font_cred, fill=cred_color)
+        self.canvas.itemconfigure(self.pass_text, font=self.font_cred, fill=cred_color)
+        self.canvas.itemconfigure(self.note_text, fill='#e0e0e0' if is_selected else '#aaaaaa')
+        self.layout()
+
+    def info_height(self):
+        fonts = self.app.fonts
+        return max(self.linespace(self.font_char) + 2, self.linespace(fonts['server']) + 2 + 2 + self.linespace(fonts['star']) + 2)
+
+    def measure(self):
+        note_height = self.linespace(self.app.fonts['note']) + 2 if self.full_text_note else 0
+        self.height = 1 + 5 + self.info_height() + note_height + 5 + 65 + 5 + 1
+        return self.height
+
+    def layout(self):
+        if self.character is None: return
+        self.measure()
+        left, right, top = self.pad_x, self.pad_x + self.width - 1, self.top
+        inner_left, inner_top = left + 1 + 8, top + 1 + 5
+        coords = self.canvas.coords
+        coords(self.rect, left, top, right, top + self.height - 1)
+        coords(self.char_text, inner_left, inner_top + 1)
+        coords(self.server_text, right - 8, inner_top + 1)
+        coords(self.star_text, right - 8, inner_top + 1 + self.linespace(self.app.fonts['server']) + 2 + 2)
+        note_top = inner_top + self.info_height()
+        coords(self.note_text, inner_left, note_top + 1)
+        cred_top = note_top + (self.linespace(self.app.fonts['note']) + 2 if self.full_text_note else 0) + 5
+        coords(self.user_text, inner_left, cred_top + 1)
+        coords(self.pass_text, inner_left, cred_top + 1 + self.linespace(self.font_cred) + 2)
+
+    fit = CharacterRow.fit
 
 
 class actlist:
     """ The main application class for the Account Lister. """
-    def __init__(self):
+    SAVE_DELAY_MS = 500
+    COMPACT_LOG_BYTES = 256 * 1024
+    INDEX_BATCH = 500
+    HANDOFF_POLL_MS = 250
+    RELOAD_POLL_MS = 1000
+    ROSTER_FILETYPES = [("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl *.ndjson"), ("All files", "*.*")]
+    VIEW_CACHE_ROWS = 250000 # laid-out rows kept across server switches and class toggles, ~160 bytes each
+
+    INSTRUMENTED = ["load_data", "save_data", "flush_data", "refresh_character_list", "build_section", "update_text_truncation",
+                    "_truncate_text", "on_character_click", "toggle_favorite", "toggle_class_expansion", "on_server_change",
+                    "on_search_change", "_on_canvas_configure", "_apply_canvas_width", "_apply_data_changes", "_on_mousewheel"]
+
+    ROW_RENDERERS = {
+        'widgets': {'section': SectionRow, 'class': ClassHeaderRow, 'char': CharacterRow},
+        'canvas': {'section': CanvasSectionRow, 'class': CanvasClassHeaderRow, 'char': CanvasCharacterRow},
+    }
+
+    def __init__(self, profile_startup=False, perf=False, renderer="widgets", instance_lock=None):
         # --- Root Window Setup ---
+        load_tk()
         self.root = tk.Tk()
         self.root.title("Account Lister")
         self.root.attributes("-topmost", True)
@@ -48,16 +812,11 @@ class actlist:
         # --- Application State and Configuration ---
         self.alpha = 0.95
         self.window_position = {"x": 1000, "y": 100, "width": 420, "height": 700}
-        self.accounts = []
-        self.recent_characters = []
-        self.favorites = []
+        self.store = AccountStore()
         self.selected_server = "All"
         self.selected_character_data = None
-        self.eq_classes = ["Bard", "Cleric", "Druid", "Enchanter", "Magician", "Monk", "Necromancer",
-                         "Paladin", "Ranger", "Rogue", "Shadow Knight", "Shaman", "Warrior", "Wizard"]
+        self.eq_classes = list(EQ_CLASSES)
         self.expanded_classes = {cls: True for cls in self.eq_classes}
-        self.character_widgets = []
-        self.class_header_widgets = {}
         self.last_viewed_class = None
         self.server_colors = {"Blue": "#4da6ff", "Green": "#4dff4d", "Red": "#ff4d4d", "All": "#ffffff"}
 
@@ -88,21 +847,82 @@ class actlist:
         self.root.option_add('*Listbox*selectBackground', '#0078D7')
         self.root.option_add('*Listbox*selectForeground', 'white')
 
+        self.truncator = TextTruncator()
+        self.pending_canvas_width = None
+        # Scroll, resize and data events only mark what they invalidate; the list catches up once a frame.
+        # Handlers look the methods up when they run, so --perf sees them once it has wrapped them.
+        self.scheduler = FrameScheduler(self.root, {
+            "data": lambda sections: self._apply_data_changes(sections),
+            "layout": lambda _: self._apply_canvas_width(),
+            "truncation": lambda _: self.update_text_truncation(),
+            "scrollregion": lambda _: self.list_view.sync_scrollregion(),
+            "render": lambda _: self.list_view.render(),
+        })
         self.fonts = {
             'char': Font(family="Arial", size=11),
             'char_bold': Font(family="Arial", size=11, weight='bold'),
             'note': Font(family="Arial", size=9, slant='italic'),
+            'server': Font(family="Arial", size=10, weight='bold'),
+            'star': Font(family="Arial", size=12),
+            'section': Font(family="Arial", size=14, weight='bold'),
+            'class': Font(family="Arial", size=12, weight='bold'),
             'cred': Font(family="Consolas", size=12, weight='bold'),
             'cred_big': Font(family="Consolas", size=16, weight='bold')
         }
+        self.linespaces = {}
+        self.renderer = renderer
+        self.canvas_rows = {} # row tag -> CanvasRow, for hit-testing in the canvas renderer
+        self.row_widgets = {} # widget path -> (WidgetRow, role), for the widget renderer's dispatcher
+        self.tooltip = ToolTip(self.root)
+
+        # --- Instrumentation (off unless asked for) ---
+        self.perf = None
+        self.perf_panel = None
+        if perf or PerfRecorder.enabled_by_env():
+            self.perf = PerfRecorder()
+            self.perf.install(self, self.INSTRUMENTED)
+            for owner, names in ((VirtualList, ["render", "set_width"]), (FrameScheduler, ["flush"]), (self.ROW_RENDERERS[renderer]['char'], ["bind", "fit"])):
+                if not hasattr(getattr(owner, names[0]), "__wrapped__"): self.perf.install(owner, names, owner.__name__ + ".")
+            self.root.bind("<F12>", lambda e: self.toggle_perf_panel())
 
         # --- Initialization Sequence ---
+        self.save_job = None
+        self.reported_write_error = False
+        self.storage = "snapshot" # or "journal", set by the "storage" key in act.txt
+        self.journal_buffer = []
+        self.journal_bytes = 0
+        self.journaled_settings = None
+        self.profile_startup = profile_startup
+        self.pending_sections = []
+        self.view_cache = SectionCache(self.VIEW_CACHE_ROWS)
+        self.required_widths = {} # server -> (store version, window width its roster needs)
+        self.first_paint_time = self.populated_time = None
+        self.search_query = ""
+        self.search_matches = self.search_groups = None
+        self.search_dirty = False
+        self.index_job = None
+        self.writer = DataWriter(DATA_FILE)
+        self.unsaved_names = set() # characters changed here but not yet in an act.txt snapshot
+        self.applying_external_edit = False
+        self.reload_thread = self.reload_result = None
         self.load_data()
+        self.disk_stamp = DataWriter.stamp(DATA_FILE)
+        self.loaded_time = time.perf_counter()
+        self.search_index = SearchIndex()
+        self.unindexed_names = list(self.store.records)
+        self.store.listeners.append(self.on_store_change)
         self.root.attributes("-alpha", self.alpha)
         self.setup_window()
         self.setup_ui()
-        self.refresh_character_list()
+        # Show the shell with Recent/Favorites right away and fill in the classes while idle.
+        self.refresh_character_list(progressive=True)
+        if self.profile_startup: self.root.after_idle(self._report_first_paint)
         self.root.protocol("WM_DELETE_WINDOW", self.on_exit)
+        self.root.after(self.RELOAD_POLL_MS, self._check_external_edit)
+        self.instance_lock = instance_lock
+        if instance_lock is not None:
+            if instance_lock.server is None: instance_lock.listen()
+            self.root.after(self.HANDOFF_POLL_MS, self._poll_handoffs)
 
     def setup_window(self):
         """Sets the initial size and position of the main window from loaded data."""
@@ -114,19 +934,28 @@ class actlist:
         self.root.minsize(350, 700)
 
     def load_data(self):
-        """Loads application state from the `act.txt` JSON file."""
-        if os.path.exists("act.txt"):
+        """Loads application state from `act.txt`, through its binary cache while that is current."""
+        if os.path.exists(DATA_FILE):
             try:
-                with open("act.txt", "r") as f:
-                    data = json.load(f)
-                    self.accounts = data.get("accounts", [])
-                    self.recent_characters = data.get("recent", [])
-                    self.favorites = data.get("favorites", [])
-                    self.alpha = data.get("alpha", 0.95)
-                    self.selected_server = data.get("last_server", "All")
-                    self.window_position = data.get("window_position", self.window_position)
-                    self.expanded_classes = data.get("expanded_classes", self.expanded_classes)
-            except (json.JSONDecodeError, FileNotFoundError):
+                data = DataWriter.read_cache(DATA_FILE)
+                if data is None:
+                    data, stamp = DataWriter.read_json(DATA_FILE)
+                    self.writer.cache(data, stamp)
+                self.store = AccountStore(data.get("accounts", []), data.get("favorites", []), data.get("recent", []))
+                self.alpha = data.get("alpha", 0.95)
+                self.selected_server = data.get("last_server", "All")
+                self.window_position = data.get("window_position", self.window_position)
+                self.expanded_classes = data.get("expanded_classes", self.expanded_classes)
+                self.storage = data.get("storage", "snapshot")
+                self.replay_journal()
+            except json.JSONDecodeError as e:
+                # Keep the unreadable file for the user to fix instead of silently replacing it.
+                backup_path = DATA_FILE + ".corrupt"
+                os.replace(DATA_FILE, backup_path)
+                messagebox.showwarning("Account Lister", f"{DATA_FILE} could not be read ({e}).\n\n"
+                                       f"It was moved to {backup_path} and a new, empty {DATA_FILE} was created.")
+                self.create_default_file()
+            except FileNotFoundError:
                 self.create_default_file()
         else:
             self.create_default_file()
@@ -139,26 +968,158 @@ class actlist:
             "expanded_classes": self.expanded_classes,
             "alpha": self.alpha
         }
-        with open("act.txt", "w") as f:
-            json.dump(default_data, f, indent=4)
-        self.accounts, self.recent_characters, self.favorites = [], [], []
+        DataWriter.write_atomic(DATA_FILE, default_data)
+        self.store = AccountStore()
 
-    def save_data(self):
-        """Saves the current application state to `act.txt`."""
-        data = {
-            "accounts": self.accounts,
-            "recent": self.recent_characters[-3:],
-            "favorites": self.favorites,
+    def replay_journal(self):
+        """Applies the changes journaled in `act.txt.log` since the last snapshot."""
+        log_path = DATA_FILE + ".log"
+        if not os.path.exists(log_path): return
+        for op in DataWriter.read_journal(DATA_FILE):
+            if op.get("op") == "settings": self.apply_settings(op)
+            else:
+                self.store.apply(op)
+                self.unsaved_names.update(self.op_names(op)) # Journaled changes are not in act.txt yet
+        self.journal_bytes = os.path.getsize(log_path)
+
+    @staticmethod
+    def op_names(op):
+        """Returns the character names a store change touched."""
+        if op["op"] == "add": return (op["account"]["name"],)
+        if op["op"] == "update": return (op["name"], op["changes"].get("name", op["name"]))
+        return (op["name"],) if "name" in op else ()
+
+    def on_store_change(self, op):
+        if not self.applying_external_edit: # Those changes are in act.txt already
+            if self.storage == "journal": self.journal_buffer.append(op)
+            self.unsaved_names.update(self.op_names(op))
+        self.search_index.apply(op, self.store)
+        self.search_dirty = True
+
+    def collect_settings(self):
+        return {
             "last_server": self.selected_server,
             "window_position": {
                 "x": self.root.winfo_x(), "y": self.root.winfo_y(),
                 "width": self.root.winfo_width(), "height": self.root.winfo_height()
             },
-            "expanded_classes": self.expanded_classes,
+            "expanded_classes": dict(self.expanded_classes),
             "alpha": self.alpha
         }
-        with open("act.txt", "w") as f:
-            json.dump(data, f, indent=4)
+
+    def apply_settings(self, settings):
+        self.selected_server = settings.get("last_server", self.selected_server)
+        self.window_position = settings.get("window_position", self.window_position)
+        self.expanded_classes = settings.get("expanded_classes", self.expanded_classes)
+        self.alpha = settings.get("alpha", self.alpha)
+
+    def collect_state(self):
+        """Returns a snapshot of the application state that the writer thread can safely serialize."""
+        return {
+            "accounts": [account.to_dict() for account in self.store.to_list()],
+            "recent": list(self.store.recent),
+            "favorites": list(self.store.favorites),
+            **self.collect_settings(),
+            "storage": self.storage
+        }
+
+    def save_data(self):
+        """Marks the state dirty; changes made within SAVE_DELAY_MS are written to `act.txt` together."""
+        if self.save_job is None: self.save_job = self.root.after(self.SAVE_DELAY_MS, self.flush_data)
+
+    def flush_data(self, compact=False):
+        """Hands the pending changes to the background writer right away.
+
+        In journal mode only the changed records are appended to `act.txt.log`, until the log grows
+        past COMPACT_LOG_BYTES (or `compact` is set) and is folded into a fresh `act.txt` snapshot.
+        """
+        if self.save_job is not None:
+            self.root.after_cancel(self.save_job)
+            self.save_job = None
+        records, self.journal_buffer = self.journal_buffer, []
+        if self.storage == "journal" and not compact and self.journal_bytes < self.COMPACT_LOG_BYTES:
+            settings = self.collect_settings()
+            if settings != self.journaled_settings:
+                records.append({"op": "settings", **settings})
+                self.journaled_settings = settings
+            if records:
+                self.writer.append(records)
+                self.journal_bytes += sum(len(json.dumps(record)) + 1 for record in records)
+        else:
+            self.merge_unseen_edit() # before the snapshot replaces it
+            self.writer.submit(self.collect_state())
+            self.journal_bytes = 0
+            self.unsaved_names.clear()
+        if self.writer.error is None: self.reported_write_error = False # so the next failure is reported again
+        elif not self.reported_write_error:
+            self.reported_write_error = True
+            messagebox.showerror("Account Lister", f"Could not save {DATA_FILE}: {self.writer.error}")
+
+    # --- Live reload of external edits ---
+    def _check_external_edit(self):
+        """Polls act.txt's mtime and size; a change not made by us is parsed on a background thread."""
+        delay = self.RELOAD_POLL_MS
+        if self.reload_thread is not None:
+            if self.reload_thread.is_alive(): delay = 50
+            else:
+                self.reload_thread = None
+                self.merge_external_edit(*self.reload_result)
+        elif not (self.writer.jobs or self.writer.writing):
+            stamp = DataWriter.stamp(DATA_FILE)
+            if stamp == self.writer.snapshot_stamp: self.disk_stamp = stamp
+            elif stamp is not None and stamp != self.disk_stamp:
+                self.reload_thread = threading.Thread(target=self._read_external_edit, args=(stamp,), name="Reload", daemon=True)
+                self.reload_thread.start()
+                delay = 50
+        self.root.after(delay, self._check_external_edit)
+
+    def merge_unseen_edit(self):
+        """Merges an edit of act.txt that the poll has not merged yet, reading it right away."""
+        if self.applying_external_edit or self.writer.jobs or self.writer.writing: return
+        stamp = DataWriter.stamp(DATA_FILE)
+        if stamp is None or stamp in (self.disk_stamp, self.writer.snapshot_stamp): return
+        if self.reload_thread is not None: self.reload_thread.join()
+        else: self._read_external_edit(stamp)
+        self.reload_thread = None
+        self.merge_external_edit(*self.reload_result)
+
+    def _read_external_edit(self, stamp):
+        try:
+            state, stamp = DataWriter.read_json(DATA_FILE) # the stamp of what was actually read
+            self.reload_result = (stamp, ExternalEdit(state, DataWriter.read_cache(DATA_FILE, current=False)))
+        except (OSError, ValueError, AttributeError): # Unreadable, e.g. saved half-way through an edit
+            self.reload_result = (stamp, None)
+
+    def merge_external_edit(self, stamp, edit):
+        """Applies an external edit of act.txt to the store (see ExternalEdit.merge). On a conflict the
+        version here is kept, and the file's version is saved to act.txt.external."""
+        self.disk_stamp = stamp
+        if edit is None: return
+        sections = set()
+        self.applying_external_edit = True
+        try: changed, conflicts = edit.merge(self.store, self.unsaved_names, lambda account: sections.update(self.sections_of(account)))
+        finally: self.applying_external_edit = False
+        unlisted = [name for name in changed if name in self.store and self.store.get(name).eq_class not in self.eq_classes]
+        if self.selected_character_data is not None and self.store.get(self.selected_character_data.name) is not self.selected_character_data:
+            self.selected_character_data = None
+        if sections: self.refresh_character_list(sections)
+        if conflicts:
+            DataWriter.write_atomic(DATA_FILE + ".external", edit.state)
+        if self.unsaved_names or self.storage == "journal":
+            self.flush_data(compact=True) # Our changes on top of theirs, as one snapshot
+        else:
+            self.writer.cache(edit.state, stamp) # The new base for the next external edit
+        if conflicts:
+            conflicts.sort()
+            messagebox.showwarning("Account Lister", f"{DATA_FILE} was changed outside the app while these characters had unsaved "
+                                   f"changes here, so the changes here were kept:\n\n{', '.join(conflicts[:20])}"
+                                   f"{' ...' if len(conflicts) > 20 else ''}\n\nThe edited file was saved as {DATA_FILE}.external.",
+                                   parent=self.root)
+        if unlisted:
+            unlisted.sort()
+            messagebox.showwarning("Account Lister", f"These characters in {DATA_FILE} have a class the list doesn't know, so they "
+                                   f"are kept but not shown:\n\n{', '.join(unlisted[:20])}{' ...' if len(unlisted) > 20 else ''}\n\n"
+                                   f"Classes are: {', '.join(self.eq_classes)}.", parent=self.root)
 
     def setup_ui(self):
         """Creates and arranges the main UI components."""
@@ -175,6 +1136,15 @@ class actlist:
                                  activebackground='#2c2c2c', activeforeground=self.server_colors[server],
                                  indicatoron=0, relief='raised', bd=2)
             rb.pack(side='left', padx=5, expand=True, fill='x')
+        search_frame = tk.Frame(top_frame, bg='#2c2c2c')
+        search_frame.pack(fill='x', pady=(8, 0))
+        tk.Label(search_frame, text="Search:", bg='#2c2c2c', fg='white', font=("Arial", 10)).pack(side='left')
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var, font=("Arial", 10), bg="#555", fg="white",
+                                insertbackground="white", relief='solid', bd=1)
+        search_entry.pack(side='left', expand=True, fill='x', padx=(5, 5))
+        search_entry.bind("<Escape>", lambda e: self.search_var.set(""))
+        self.search_var.trace_add("write", lambda *args: self.on_search_change())
         self.setup_scrollable_frame()
         
         button_frame = tk.Frame(self.root, bg='#2c2c2c')
@@ -196,185 +1166,276 @@ class actlist:
                               bg='#555555', fg='white', font=("Arial", 10), relief='raised', bd=2)
         exit_btn.grid(row=0, column=2, sticky='ew', padx=(5, 0))
 
+        import_btn = tk.Button(button_frame, text="Import...", command=self.import_dialog,
+                               bg='#555555', fg='white', font=("Arial", 10), relief='raised', bd=2)
+        import_btn.grid(row=1, column=0, sticky='ew', padx=(0, 5), pady=(5, 0))
+        export_btn = tk.Button(button_frame, text="Export...", command=self.export_dialog,
+                               bg='#555555', fg='white', font=("Arial", 10), relief='raised', bd=2)
+        export_btn.grid(row=1, column=1, columnspan=2, sticky='ew', padx=(5, 0), pady=(5, 0))
+
     def setup_scrollable_frame(self):
-        """Sets up the scrollable area using a Canvas widget."""
+        """Sets up the scrollable area: a Canvas that hosts the virtualized character list."""
         canvas_frame = tk.Frame(self.root, bg='#2c2c2c')
         canvas_frame.pack(fill='both', expand=True, padx=10, pady=5)
         self.canvas = tk.Canvas(canvas_frame, bg='#2c2c2c', highlightthickness=0)
         scrollbar = ttk.Scrollbar(canvas_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = tk.Frame(self.canvas, bg='#2c2c2c')
-        self.scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
+        self.list_view = VirtualList(self.canvas, self, self.ROW_RENDERERS[self.renderer])
         
         self.canvas.bind("<Configure>", self._on_canvas_configure)
+        # Row events are handled once for the whole list: canvas rows are hit-tested by item tag,
+        # widget rows carry a shared bindtag and are looked up by widget.
+        if self.renderer == 'canvas':
+            self.canvas.bind("<Button-1>", self._on_canvas_click)
+            self.canvas.bind("<Motion>", self._on_canvas_motion)
+            self.canvas.bind("<Leave>", lambda e: self.tooltip.hide())
+        else:
+            self.root.bind_class(WidgetRow.BINDTAG, "<Button-1>", self._on_row_click)
+            self.root.bind_class(WidgetRow.BINDTAG, "<Enter>", self._on_row_enter)
+            self.root.bind_class(WidgetRow.BINDTAG, "<Leave>", lambda e: self.tooltip.hide())
         
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        # Every view change (scrollbar, wheel, yview_moveto, resize) passes through here, so it
+        # is the single place where newly exposed rows get materialized, once per frame.
+        def on_yview(first, last):
+            scrollbar.set(first, last)
+            self.scheduler.mark("render")
+        self.canvas.configure(yscrollcommand=on_yview)
         scrollbar.pack(side="right", fill="y")
         self.canvas.pack(side="left", fill="both", expand=True)
-        self.root.bind_all("<MouseWheel>", self._on_mousewheel)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"): # Button-4/5 is the wheel on X11
+            self.canvas.bind(sequence, self._on_mousewheel)
+            self.root.bind_class(WidgetRow.BINDTAG, sequence, self._on_mousewheel)
 
     def _on_canvas_configure(self, event):
-        self.canvas.itemconfig(self.canvas_window, width=event.width)
-        self.update_text_truncation()
+        # A window drag sends a burst of Configure events; only the last width matters.
+        self.pending_canvas_width = event.width
+        self.scheduler.mark("layout")
+
+    def _apply_canvas_width(self, _=None):
+        if self.pending_canvas_width != self.list_view.width:
+            self.list_view.set_width(self.pending_canvas_width)
+            for flag in ("truncation", "scrollregion"): self.scheduler.mark(flag)
+        self.scheduler.mark("render") # a taller window exposes more rows
+
+    def linespace(self, font):
+        """Returns a font's line height, asking Tk only once per font."""
+        if font.name not in self.linespaces: self.linespaces[font.name] = font.metrics('linespace')
+        return self.linespaces[font.name]
+
+    def canvas_row_at(self, event):
+        """Returns the canvas row under the pointer and the tags of the item hit, or (None, ())."""
+        items = self.canvas.find_withtag('current')
+        if not items: return None, ()
+        tags = self.canvas.gettags(items[0])
+        for tag in tags:
+            if tag in self.canvas_rows: return self.canvas_rows[tag], tags
+        return None, tags
+
+    def on_row_event(self, row, role):
+        """Handles a click on a list row; `role` says which part of the row was hit."""
+        if row is None or row.key is None: return
+        if role == 'class': self.toggle_class_expansion(row.eq_class)
+        elif role == 'star':
+            self.tooltip.hide()
+            self.toggle_favorite(row.character.name)
+        elif role == 'char': self.on_character_click(row.character)
+
+    def _on_row_click(self, event):
+        self.on_row_event(*self.row_widgets.get(str(event.widget), (None, None)))
+
+    def _on_row_enter(self, event):
+        row, role = self.row_widgets.get(str(event.widget), (None, None))
+        if role == 'star' and row.key is not None: self.tooltip.schedule(row, row.star_tip, event.x_root + 15, event.y_root + 10)
+
+    def _on_canvas_click(self, event):
+        row, tags = self.canvas_row_at(event)
+        if row is not None: self.on_row_event(row, 'star' if 'star' in tags else row.kind)
+
+    def _on_canvas_motion(self, event):
+        row, tags = self.canvas_row_at(event)
+        clickable = row is not None and row.key is not None and row.kind in ('class', 'char')
+        self.canvas.configure(cursor="hand2" if clickable else "")
+        if clickable and 'star' in tags: self.tooltip.schedule(row, row.star_tip, event.x_root + 15, event.y_root + 10)
+        else: self.tooltip.hide()
 
     def _on_mousewheel(self, event):
-        if platform.system() == "Windows":
+        self.tooltip.hide()
+        if event.num == 5: self.canvas.yview_scroll(1, "units")
+        elif event.num == 4: self.canvas.yview_scroll(-1, "units")
+        elif PLATFORM == "Windows":
             self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-        else:
-            if event.num == 5: self.canvas.yview_scroll(1, "units")
-            elif event.num == 4: self.canvas.yview_scroll(-1, "units")
+        elif event.delta: self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
 
     def on_server_change(self):
         self.capture_current_view_class()
         self.selected_server = self.server_var.get()
+        self.search_dirty = True
         self.refresh_character_list()
 
-    def refresh_character_list(self):
-        self.canvas.yview_moveto(0)
-        for widget in self.scrollable_frame.winfo_children(): widget.destroy()
-        self.character_widgets.clear()
-        self.class_header_widgets.clear()
-        
-        filtered_accounts = [acc for acc in self.accounts if self.selected_server == "All" or acc["server"] == self.selected_server]
-        
-        recent_chars_data = [next((acc for acc in self.accounts if acc["name"] == name), None) for name in reversed(self.recent_characters)]
-        recent_chars_data = [char for char in recent_chars_data if char and (self.selected_server == "All" or char["server"] == self.selected_server)]
-        if recent_chars_data:
-            tk.Label(self.scrollable_frame, text="Recent", font=("Arial", 14, "bold"), bg='#2c2c2c', fg='#ffff4d').pack(anchor='w', pady=(0, 8))
-            for char_data in recent_chars_data: self.create_character_widget(char_data, is_recent=True)
+    def on_search_change(self):
+        query = self.search_var.get().strip()
+        if query == self.search_query: return
+        self.search_query = query
+        self.search_dirty = True
+        self.refresh_character_list()
 
-        fav_chars_data = [next((acc for acc in self.accounts if acc["name"] == name), None) for name in sorted(self.favorites)]
-        fav_chars_data = [char for char in fav_chars_data if char and (self.selected_server == "All" or char["server"] == self.selected_server)]
-        if fav_chars_data:
-            tk.Label(self.scrollable_frame, text="Favorites", font=("Arial", 14, "bold"), bg='#2c2c2c', fg='#ffd700').pack(anchor='w', pady=(10, 8))
-            for char_data in fav_chars_data: self.create_character_widget(char_data, is_recent=True)
+    def update_search_results(self):
+        """Re-runs the search and groups the matches on the selected server by class."""
+        self.search_dirty = False
+        if not self.search_query:
+            self.search_matches, self.search_groups = None, None
+            return
+        if self.index_job is not None: # finish the idle build now
+            self.root.after_cancel(self.index_job)
+            self.index_job = None
+        while self.unindexed_names: self._index_next_batch()
+        self.search_matches = self.search_index.search(self.search_query)
+        self.search_groups = {}
+        for name in self.search_matches:
+            record = self.store.get(name)
+            if record and (self.selected_server == "All" or record.server == self.selected_server):
+                self.search_groups.setdefault(record.eq_class, []).append(record)
+        for records in self.search_groups.values(): records.sort(key=lambda r: r.name)
 
-        class_groups = {cls: [] for cls in self.eq_classes}
-        for account in filtered_accounts: class_groups[account["class"]].append(account)
+    def _build_search_index_step(self):
+        """Indexes the next batch of accounts; the index is built in idle time after startup."""
+        self._index_next_batch()
+        self.index_job = self.root.after_idle(self._build_search_index_step) if self.unindexed_names else None
 
-        for eq_class in self.eq_classes:
-            characters = class_groups[eq_class]
-            header_frame = tk.Frame(self.scrollable_frame, bg='#2c2c2c')
-            header_frame.pack(fill='x', pady=(10, 2))
-            is_expanded = self.expanded_classes.get(eq_class, True)
-            arrow, fg_color = ("▼", '#ffffff') if is_expanded else ("▶", '#ffffff')
-            if not characters: fg_color = '#666666'
-            class_text = f"{arrow} {eq_class} ({len(characters)})"
-            class_label = tk.Label(header_frame, text=class_text, font=("Arial", 12, "bold"), bg='#2c2c2c', fg=fg_color, cursor="hand2")
-            class_label.pack(anchor='w')
-            class_label.bind("<Button-1>", lambda e, cls=eq_class: self.toggle_class_expansion(cls))
-            self.class_header_widgets[eq_class] = header_frame
-            if is_expanded:
-                for character in sorted(characters, key=lambda c: c['name']): self.create_character_widget(character)
-        
-        self.autosize_window_width(filtered_accounts)
-        self.root.update_idletasks()
+    def _index_next_batch(self):
+        batch, self.unindexed_names = self.unindexed_names[-self.INDEX_BATCH:], self.unindexed_names[:-self.INDEX_BATCH]
+        for name in batch:
+            record = self.store.get(name)
+            if record is not None: self.search_index.add(record)
+
+    def list_section_ids(self):
+        return ["Recent", "Favorites"] + self.eq_classes
+
+    def build_section(self, section_id):
+        """Returns the rows of one list section for the current server filter and search."""
+        if self.search_dirty: self.update_search_results()
+        if section_id in ("Recent", "Favorites"):
+            if section_id == "Recent": chars_data, color, top = self.store.recent_on(self.selected_server), '#ffff4d', 0
+            else: chars_data, color, top = self.store.favorites_on(self.selected_server), '#ffd700', 10
+            if self.search_matches is not None: chars_data = [char for char in chars_data if char.name in self.search_matches]
+            if not chars_data: return []
+            return [(('section', section_id), 'section', (section_id, color, top))] + \
+                   [((section_id, id(char_data)), 'char', (char_data, True)) for char_data in chars_data]
+        is_expanded = self.expanded_classes.get(section_id, True)
+        if self.search_groups is not None:
+            characters = self.search_groups.get(section_id)
+            if not characters: return [] # Classes without matches are hidden while searching.
+            rows = [(('class', section_id), 'class', (section_id, len(characters), is_expanded))]
+        else:
+            characters = None
+            rows = [(('class', section_id), 'class', (section_id, self.store.class_count(section_id, self.selected_server), is_expanded))]
+        if is_expanded:
+            if characters is None: characters = self.store.class_members(section_id, self.selected_server)
+            rows.extend(((section_id, id(character)), 'char', (character, False)) for character in characters)
+        return rows
+
+    def section_view(self, section_id):
+        """Returns a section laid out for the current view, reusing the cached layout while the
+        slice of the store it shows is unchanged. Search results are not cached."""
+        if self.search_dirty: self.update_search_results()
+        if self.search_matches is not None: return self.list_view.layout(self.build_section(section_id))
+        key = (section_id, self.selected_server, self.expanded_classes.get(section_id, True))
+        version = self.store.version(section_id if section_id in ("Recent", "Favorites") else (section_id, self.selected_server))
+        section = self.view_cache.get(key, version)
+        if section is None:
+            section = self.list_view.layout(self.build_section(section_id))
+            self.view_cache.put(key, version, section)
+        return section
+
+    def refresh_character_list(self, sections=None, progressive=False):
+        """Marks the given list sections, or the whole list, for rebuilding on the next frame, so an
+        edit touching several sections (or a burst of keystrokes) is laid out once.
+
+        With `progressive`, the whole list is rebuilt now: the class sections start out empty and
+        are filled in one per idle callback, so the window shows up before a large roster is laid out.
+        """
+        if progressive: self._rebuild_list(progressive=True)
+        elif sections is None: self.scheduler.mark("data", None)
+        else: self.scheduler.mark("data", *(set(sections) & set(self.list_section_ids()))) # a class typo in act.txt has no section
+
+    def _apply_data_changes(self, sections):
+        """Rebuilds the sections marked since the last frame, or the whole list if any mark was for all of it."""
+        if None in sections:
+            self._rebuild_list()
+            return
+        self.pending_sections = [section_id for section_id in self.pending_sections if section_id not in sections]
+        self.list_view.update_sections({section_id: self.section_view(section_id) for section_id in sections})
+
+    def _rebuild_list(self, progressive=False):
+        self.canvas.yview_moveto(0)
+        self.pending_sections = list(self.eq_classes) if progressive else []
+        self.list_view.set_sections([(section_id, self.list_view.layout([]) if section_id in self.pending_sections else self.section_view(section_id))
+                                     for section_id in self.list_section_ids()])
+        if progressive:
+            self.root.after_idle(self._populate_next_section)
+            return
+        self.autosize_for_server()
         self.restore_class_view()
-        self.update_text_truncation()
+
+    def _populate_next_section(self):
+        if self.pending_sections:
+            section_id = self.pending_sections.pop(0)
+            self.list_view.update_sections({section_id: self.section_view(section_id)})
+            self.root.after_idle(self._populate_next_section)
+            return
+        self.autosize_for_server()
+        if self.index_job is None and self.unindexed_names: self.index_job = self.root.after_idle(self._build_search_index_step)
+        if self.profile_startup and self.populated_time is None:
+            self.populated_time = time.perf_counter()
+            print(f"startup: load {1000 * (self.loaded_time - STARTUP_TIME):.1f} ms, "
+                  f"first paint {1000 * (self.first_paint_time - STARTUP_TIME):.1f} ms, "
+                  f"fully populated {1000 * (self.populated_time - STARTUP_TIME):.1f} ms "
+                  f"({len(self.store)} accounts)", flush=True)
+
+    def _report_first_paint(self):
+        self.first_paint_time = time.perf_counter()
 
     def update_text_truncation(self):
-        for info in self.character_widgets:
-            char_width = info['info_line'].winfo_width() - info['right_panel'].winfo_width() - 20
-            self._truncate_text(info['char_label'], info['full_text_char'], char_width, info['font_char'])
-            if info['note_label']:
-                note_width = info['frame'].winfo_width() - 20
-                self._truncate_text(info['note_label'], info['full_text_note'], note_width, self.fonts['note'])
-            cred_width = info['cred_container'].winfo_width() - 10
-            self._truncate_text(info['user_label'], info['full_text_user'], cred_width, info['font_cred'])
-            self._truncate_text(info['pass_label'], info['full_text_pass'], cred_width, info['font_cred'])
+        self.list_view.fit_all()
             
     def _truncate_text(self, label, full_text, max_width, font):
-        if max_width < 20: return
-        if font.measure(full_text) <= max_width: label.config(text=full_text)
-        else:
-            for i in range(len(full_text) - 1, 0, -1):
-                if font.measure(full_text[:i] + "...") <= max_width:
-                    label.config(text=full_text[:i] + "...")
-                    return
-            label.config(text="...")
+        self.truncator.fit(label, full_text, max_width, font)
 
     def capture_current_view_class(self):
         self.last_viewed_class = None
-        self.root.update_idletasks()
-        try:
-            scroll_region_height = self.canvas.bbox("all")[3]
-            if scroll_region_height == 0: return
-            view_top_y = self.canvas.yview()[0] * scroll_region_height
-            top_class = None
-            for class_name, header_widget in self.class_header_widgets.items():
-                if header_widget.winfo_y() <= view_top_y: top_class = class_name
-            self.last_viewed_class = top_class
-        except (TypeError, IndexError): self.last_viewed_class = None
+        view_top_y = self.canvas.canvasy(0)
+        for eq_class in self.eq_classes:
+            offset = self.list_view.offset_of(('class', eq_class), eq_class)
+            if offset is not None and offset <= view_top_y: self.last_viewed_class = eq_class
 
     def restore_class_view(self):
-        if self.last_viewed_class and self.last_viewed_class in self.class_header_widgets:
-            target_widget = self.class_header_widgets[self.last_viewed_class]
-            try:
-                total_height = self.canvas.bbox("all")[3]
-                if total_height > 0:
-                    self.canvas.yview_moveto(target_widget.winfo_y() / total_height)
-            except (TypeError, IndexError): self.canvas.yview_moveto(0)
+        offset = self.list_view.offset_of(('class', self.last_viewed_class), self.last_viewed_class) if self.last_viewed_class else None
+        if offset is not None and self.list_view.total_height > 0:
+            self.canvas.yview_moveto(offset / self.list_view.total_height)
         else: self.canvas.yview_moveto(0)
         self.last_viewed_class = None
 
-    def create_character_widget(self, character, is_recent=False):
-        char_frame = tk.Frame(self.scrollable_frame, bg='#404040', relief='solid', bd=1)
-        char_frame.pack(fill='x', padx=5, pady=3)
-        info_line = tk.Frame(char_frame, bg='#404040')
-        info_line.pack(fill='x', padx=8, pady=(5,0))
-        info_line.grid_columnconfigure(0, weight=1); info_line.grid_columnconfigure(1, weight=0)
-        full_text_char = f"{character['name']} - {character['class']} (Lvl {character['level']})" if is_recent else f"{character['name']} (Lvl {character['level']})"
-        char_label = tk.Label(info_line, text=full_text_char, font=self.fonts['char'], bg='#404040', fg='white', anchor='w')
-        char_label.grid(row=0, column=0, sticky='ew')
-        right_panel = tk.Frame(info_line, bg='#404040')
-        right_panel.grid(row=0, column=1, sticky='e', padx=(10, 0))
-        server_label = tk.Label(right_panel, text=character["server"], font=("Arial", 10, "bold"), bg='#404040', fg=self.server_colors[character["server"]], anchor='e')
-        server_label.pack(anchor='e')
-        is_fav = character['name'] in self.favorites
-        star_char, star_color = ("★", "#ffd700") if is_fav else ("☆", "#999999")
-        star_label = tk.Label(right_panel, text=star_char, font=("Arial", 12), bg='#404040', fg=star_color, cursor="hand2")
-        star_label.pack(anchor='e', pady=(2, 0))
-        star_label.bind("<Button-1>", lambda e, char_name=character['name']: self.toggle_favorite(char_name))
-        ToolTip(star_label, "Remove from favorites" if is_fav else "Add to favorites")
-        note_label = None; full_text_note = character.get("note", "")
-        if full_text_note:
-            note_label = tk.Label(char_frame, text=full_text_note, font=self.fonts['note'], bg='#404040', fg='#ccc', anchor='w')
-            note_label.pack(fill='x', padx=8)
-        cred_container = tk.Frame(char_frame, bg='#404040', height=65)
-        cred_container.pack(fill='x', padx=8, pady=(5,5)); cred_container.pack_propagate(False)
-        full_text_user = f"User: {character['username']}"; full_text_pass = f"Pass: {character['password']}"
-        username_label = tk.Label(cred_container, text=full_text_user, font=self.fonts['cred'], bg='#404040', fg='white', anchor='w')
-        username_label.pack(fill='x')
-        password_label = tk.Label(cred_container, text=full_text_pass, font=self.fonts['cred'], bg='#404040', fg='white', anchor='w')
-        password_label.pack(fill='x')
-        widget_info = {'frame': char_frame, 'info_line': info_line, 'right_panel': right_panel, 'char_label': char_label, 'server_label': server_label, 'star_label': star_label, 'cred_container': cred_container, 'user_label': username_label, 'pass_label': password_label, 'note_label': note_label, 'full_text_char': full_text_char, 'full_text_note': full_text_note, 'full_text_user': full_text_user, 'full_text_pass': full_text_pass, 'font_char': self.fonts['char'], 'font_cred': self.fonts['cred']}
-        self.character_widgets.append(widget_info)
-        def on_click(event): self.on_character_click(character, widget_info)
-        for widget in [char_frame, info_line, char_label, server_label, cred_container, username_label, password_label, right_panel]:
-            widget.bind("<Button-1>", on_click); widget.configure(cursor="hand2")
-        if note_label: note_label.bind("<Button-1>", on_click); note_label.configure(cursor="hand2")
-
-    def on_character_click(self, character, clicked_widget_info):
-        self.selected_character_data = character
-        for info in self.character_widgets:
-            is_selected = (info == clicked_widget_info)
-            bg_color = '#005a9e' if is_selected else '#404040'
-            info['font_char'] = self.fonts['char_bold'] if is_selected else self.fonts['char']
-            info['font_cred'] = self.fonts['cred_big'] if is_selected else self.fonts['cred']
-            info['frame'].config(bg=bg_color); info['info_line'].config(bg=bg_color); info['cred_container'].config(bg=bg_color); info['right_panel'].config(bg=bg_color); info['server_label'].config(bg=bg_color); info['star_label'].config(bg=bg_color)
-            info['char_label'].config(font=info['font_char'], bg=bg_color, fg='#ffffff')
-            info['user_label'].config(font=info['font_cred'], bg=bg_color, fg=('#ffffff' if is_selected else '#aaaaaa'))
-            info['pass_label'].config(font=info['font_cred'], bg=bg_color, fg=('#ffffff' if is_selected else '#aaaaaa'))
-            if info['note_label']: info['note_label'].config(bg=bg_color, fg=('#e0e0e0' if is_selected else '#aaaaaa'))
-        self.update_text_truncation()
-        char_name = character["name"]
-        if char_name in self.recent_characters: self.recent_characters.remove(char_name)
-        self.recent_characters.append(char_name)
-        if len(self.recent_characters) > 3: self.recent_characters.pop(0)
+    def is_selected(self, character):
+        return character is not None and character is self.selected_character_data
+
+    def select_character(self, character):
+        """Moves the selection, repainting only the rows of the old and new selected characters."""
+        previous, self.selected_character_data = self.selected_character_data, character
+        if previous is character: return
+        for record, is_selected in ((previous, False), (character, True)):
+            if record is None: continue
+            for row in self.list_view.rows_of(id(record)):
+                row.paint(is_selected)
+                self.list_view.fit(row)
+
+    def on_character_click(self, character):
+        self.select_character(character)
+        char_name = character.name
+        self.store.touch_recent(char_name)
         self.save_data()
     
     def edit_character_dialog(self):
         if not self.selected_character_data: return
+        character = self.selected_character_data # a live reload may deselect it while the dialog is open
         dialog = tk.Toplevel(self.root); dialog.title("Edit Character"); dialog.configure(bg='#2c2c2c'); dialog.attributes("-topmost", True); dialog.transient(self.root); dialog.grab_set(); dialog.geometry(f"350x520+{self.root.winfo_x()+50}+{self.root.winfo_y()+50}"); dialog.resizable(False, False)
         main_frame = tk.Frame(dialog, bg='#2c2c2c'); main_frame.pack(expand=True, fill='both', padx=15, pady=10)
         field_map = {"Character Name": "name", "Level": "level", "Username": "username", "Password": "password", "Note (optional)": "note"}
@@ -383,51 +1444,52 @@ class actlist:
             f = tk.Frame(main_frame, bg='#2c2c2c'); f.pack(fill='x', pady=5)
             tk.Label(f, text=field_text + ":", bg='#2c2c2c', fg='white', font=("Arial", 10)).pack(side='left', anchor='w')
             entry = tk.Entry(f, font=("Arial", 10), bg="#555", fg="white", insertbackground="white", relief='solid', bd=1)
-            entry.insert(0, self.selected_character_data.get(data_key, "")); entry.pack(side='right', expand=True, fill='x'); entries[field_text] = entry
+            entry.insert(0, getattr(character, data_key)); entry.pack(side='right', expand=True, fill='x'); entries[field_text] = entry
         tk.Label(main_frame, text="Server:", bg='#2c2c2c', fg='white', font=("Arial", 10)).pack(pady=(10,2), anchor='w')
-        server_var = tk.StringVar(value=self.selected_character_data.get("server")); server_combo = ttk.Combobox(main_frame, textvariable=server_var, values=["Blue", "Green", "Red"], state="readonly"); server_combo.pack(fill='x')
+        server_var = tk.StringVar(value=character.server); server_combo = ttk.Combobox(main_frame, textvariable=server_var, values=["Blue", "Green", "Red"], state="readonly"); server_combo.pack(fill='x')
         tk.Label(main_frame, text="Class:", bg='#2c2c2c', fg='white', font=("Arial", 10)).pack(pady=(10,2), anchor='w')
-        class_var = tk.StringVar(value=self.selected_character_data.get("class")); class_combo = ttk.Combobox(main_frame, textvariable=class_var, values=self.eq_classes, state="readonly"); class_combo.pack(fill='x')
+        class_var = tk.StringVar(value=character.eq_class); class_combo = ttk.Combobox(main_frame, textvariable=class_var, values=self.eq_classes, state="readonly"); class_combo.pack(fill='x')
         
+        def still_in_store():
+            if self.store.get(character.name) is character: return True
+            messagebox.showerror("Error", f"{character.name} was renamed or removed in {DATA_FILE} while this dialog was open.", parent=dialog)
+            dialog.destroy()
+            return False
+
         def save_character():
+            if not still_in_store(): return
             if not all([entries["Character Name"].get(), entries["Level"].get(), server_var.get(), class_var.get(), entries["Username"].get(), entries["Password"].get()]):
                 messagebox.showerror("Error", "Please fill in all required fields", parent=dialog); return
             try: level = int(entries["Level"].get())
             except ValueError: messagebox.showerror("Error", "Level must be a number", parent=dialog); return
             
-            scroll_pos = self.canvas.yview()[0] # Capture scroll pos before refresh
+            changed_sections = self.sections_of(character) # Where the old row lived
             
-            self.selected_character_data['name'] = entries["Character Name"].get()
-            self.selected_character_data['level'] = level
-            self.selected_character_data['server'] = server_var.get()
-            self.selected_character_data['class'] = class_var.get()
-            self.selected_character_data['username'] = entries["Username"].get()
-            self.selected_character_data['password'] = entries["Password"].get()
-            self.selected_character_data['note'] = entries["Note (optional)"].get()
+            old_name, new_name = character.name, entries["Character Name"].get()
+            if new_name != old_name and new_name in self.store:
+                messagebox.showerror("Error", f"A character named {new_name} already exists", parent=dialog); return
+            self.store.update(old_name, {"name": new_name, "level": level, "server": server_var.get(), "class": class_var.get(),
+                                         "username": entries["Username"].get(), "password": entries["Password"].get(), "note": entries["Note (optional)"].get()})
             
             self.save_data()
-            self.refresh_character_list()
-            self.root.update_idletasks() # Ensure list is redrawn
-            self.canvas.yview_moveto(scroll_pos) # Restore scroll pos
+            self.refresh_character_list(changed_sections | self.sections_of(character))
+            self.autosize_window_width([character])
             dialog.destroy()
 
         def delete_character():
-            char_name = self.selected_character_data['name']
+            if not still_in_store(): return
+            char_name = character.name
             if not messagebox.askyesno("Confirm Delete", f"Are you sure you want to permanently delete {char_name}?", parent=dialog):
                 return
+            if not still_in_store(): return # reloaded while asking
             
-            scroll_pos = self.canvas.yview()[0] # Capture scroll pos
+            changed_sections = self.sections_of(character)
             
-            # Remove from all relevant lists
-            self.accounts.remove(self.selected_character_data)
-            if char_name in self.favorites: self.favorites.remove(char_name)
-            if char_name in self.recent_characters: self.recent_characters.remove(char_name)
+            self.store.delete(char_name) # Also drops it from favorites and recent
             
-            self.selected_character_data = None # Deselect
+            if self.is_selected(character): self.select_character(None) # Deselect
             self.save_data()
-            self.refresh_character_list()
-            self.root.update_idletasks()
-            self.canvas.yview_moveto(scroll_pos) # Restore scroll pos
+            self.refresh_character_list(changed_sections)
             dialog.destroy()
 
         btn_frame = tk.Frame(main_frame, bg='#2c2c2c'); btn_frame.pack(fill='x', pady=20)
@@ -442,23 +1504,71 @@ class actlist:
 
     def toggle_class_expansion(self, eq_class):
         self.expanded_classes[eq_class] = not self.expanded_classes.get(eq_class, True)
-        self.refresh_character_list()
+        self.refresh_character_list({eq_class})
 
     def toggle_favorite(self, character_name):
-        scroll_pos = self.canvas.yview()[0]
-        if character_name in self.favorites: self.favorites.remove(character_name)
-        else: self.favorites.append(character_name)
-        self.save_data(); self.refresh_character_list(); self.root.update_idletasks(); self.canvas.yview_moveto(scroll_pos)
+        self.store.toggle_favorite(character_name)
+        # Only Favorites changes shape; stars elsewhere are repainted as their row signatures change.
+        self.save_data(); self.refresh_character_list({"Favorites"})
+
+    def _poll_handoffs(self):
+        for message in self.instance_lock.receive(): self.handle_handoff(message)
+        self.root.after(self.HANDOFF_POLL_MS, self._poll_handoffs)
+
+    def handle_handoff(self, message):
+        """Brings the window forward for a relaunch, optionally switching server and selecting a character."""
+        self.root.deiconify(); self.root.lift(); self.root.focus_force()
+        server = message.get("server")
+        if server in self.server_colors and server != self.selected_server:
+            self.server_var.set(server); self.on_server_change()
+        if message.get("select"): self.reveal_character(message["select"])
+
+    def reveal_character(self, name):
+        """Selects a character by name and scrolls its class row into view, clearing anything hiding it."""
+        character = self.store.get(name) or next((c for c in self.store.records.values() if c.name.lower() == name.lower()), None)
+        if character is None: return
+        eq_class = character.eq_class
+        if self.search_var.get():
+            self.search_var.set(""); self.on_search_change()
+        if self.selected_server not in ("All", character.server):
+            self.server_var.set(character.server); self.on_server_change()
+        if eq_class in self.pending_sections: self.refresh_character_list({eq_class})
+        if not self.expanded_classes.get(eq_class, True): self.toggle_class_expansion(eq_class)
+        self.on_character_click(character)
+        self.scheduler.flush() # lay the changes out before looking up the row
+        offset = self.list_view.offset_of((eq_class, id(character)), eq_class)
+        if offset is not None and self.list_view.total_height > 0: self.canvas.yview_moveto(offset / self.list_view.total_height)
+
+    def sections_of(self, character):
+        """Returns the ids of the list sections that show a row for the given character."""
+        sections = {character.eq_class}
+        if character.name in self.store.recent: sections.add("Recent")
+        if self.store.is_favorite(character.name): sections.add("Favorites")
+        return sections
+
+    def autosize_for_server(self):
+        """Autosizes the window for the selected server, measuring its roster only after it changes."""
+        server, version = self.selected_server, self.store.version(self.selected_server)
+        cached = self.required_widths.get(server)
+        if cached is None or cached[0] != version:
+            cached = self.required_widths[server] = (version, self.required_window_width(self.store.accounts_on(server)))
+        self.grow_window_to(cached[1])
 
     def autosize_window_width(self, accounts):
-        if not accounts: return
+        self.grow_window_to(self.required_window_width(accounts))
+
+    def required_window_width(self, accounts):
+        if not accounts: return 0
         max_pixel_width = 0
-        for acc in accounts:
-            width = self.fonts['char_bold'].measure(f"{acc['name']} (Lvl {acc['level']})")
+        # Only the longest labels can set the width, so measure a handful instead of the whole roster.
+        for acc in heapq.nlargest(20, accounts, key=lambda a: len(a.name) + len(str(a.level))):
+            width = self.truncator.measure(self.fonts['char_bold'], f"{acc.name} (Lvl {acc.level})")
             if width > max_pixel_width: max_pixel_width = width
         required_width = max_pixel_width + 160
-        capped_width = min(required_width, 600)
-        if capped_width > self.root.winfo_width(): self.root.geometry(f"{capped_width}x{self.root.winfo_height()}")
+        return min(required_width, 600)
+
+    def grow_window_to(self, width):
+        if width > self.root.winfo_width(): self.root.geometry(f"{width}x{self.root.winfo_height()}")
 
     def add_character_dialog(self):
         dialog = tk.Toplevel(self.root); dialog.title("Add Character"); dialog.configure(bg='#2c2c2c'); dialog.attributes("-topmost", True); dialog.transient(self.root); dialog.grab_set(); dialog.geometry(f"350x480+{self.root.winfo_x()+50}+{self.root.winfo_y()+50}"); dialog.resizable(False, False)
@@ -478,25 +1588,121 @@ class actlist:
             try: level = int(entries["Level"].get())
             except ValueError: messagebox.showerror("Error", "Level must be a number", parent=dialog); return
             new_char = {"name": entries["Character Name"].get(), "level": level, "server": server_var.get(), "class": class_var.get(), "username": entries["Username"].get(), "password": entries["Password"].get(), "note": entries["Note (optional)"].get()}
-            self.accounts.append(new_char); self.save_data(); self.refresh_character_list(); dialog.destroy()
+            if new_char["name"] in self.store:
+                messagebox.showerror("Error", f"A character named {new_char['name']} already exists", parent=dialog); return
+            new_char = self.store.add(new_char); self.save_data(); self.refresh_character_list({new_char.eq_class}); self.autosize_window_width([new_char]); dialog.destroy()
         btn_frame = tk.Frame(main_frame, bg='#2c2c2c'); btn_frame.pack(fill='x', pady=20)
         tk.Button(btn_frame, text="Add", command=add_character, bg='#0078D7', fg='white', font=("Arial", 10, "bold")).pack(side='left', expand=True, fill='x', padx=5, ipady=3)
         tk.Button(btn_frame, text="Cancel", command=dialog.destroy, bg='#555555', fg='white', font=("Arial", 10)).pack(side='right', expand=True, fill='x', padx=5, ipady=3)
         entries["Character Name"].focus()
 
+    def import_dialog(self):
+        """Imports a CSV or JSON Lines roster, then saves and refreshes once."""
+        path = filedialog.askopenfilename(parent=self.root, title="Import Accounts", filetypes=self.ROSTER_FILETYPES)
+        if not path: return
+        merge = messagebox.askyesnocancel("Import Accounts", "When a character already exists, update it from the file?\n\n"
+                                          "Yes updates it, No keeps it unchanged.", parent=self.root)
+        if merge is None: return
+        try: result = RosterImport(self.store, "merge" if merge else "skip").run(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            messagebox.showerror("Import Accounts", f"Could not read {path}: {e}", parent=self.root); return
+        finally:
+            # Whatever was imported before a read error is kept, so always save and redraw it.
+            self.flush_data(compact=True)
+            self.refresh_character_list()
+        messagebox.showinfo("Import Accounts", result.summary(), parent=self.root)
+
+    def export_dialog(self):
+        path = filedialog.asksaveasfilename(parent=self.root, title="Export Accounts", defaultextension=".csv", filetypes=self.ROSTER_FILETYPES)
+        if not path: return
+        try: count = export_roster(path, self.store.records.values())
+        except OSError as e:
+            messagebox.showerror("Export Accounts", f"Could not write {path}: {e}", parent=self.root); return
+        messagebox.showinfo("Export Accounts", f"Exported {count} characters to {path}.", parent=self.root)
+
+    def count_widgets(self, widget=None):
+        widget = widget or self.root
+        return 1 + sum(self.count_widgets(child) for child in widget.winfo_children())
+
+    def perf_extra(self):
+        return {"widgets": self.count_widgets(), "font_measure_calls": self.truncator.measure_calls,
+                "width_cache_entries": len(self.truncator.widths), "accounts": len(self.store),
+                "frames": {"marks": self.scheduler.marks, "flushes": self.scheduler.flushes},
+                "view_cache": {"sections": len(self.view_cache.entries), "rows": self.view_cache.rows,
+                               "hits": self.view_cache.hits, "misses": self.view_cache.misses}}
+
+    def toggle_perf_panel(self):
+        """Shows or hides the live instrumentation panel (F12)."""
+        if self.perf_panel is not None:
+            self.perf_panel.destroy()
+            self.perf_panel = None
+            return
+        self.perf_panel = tk.Toplevel(self.root); self.perf_panel.title("Performance"); self.perf_panel.configure(bg='#2c2c2c'); self.perf_panel.attributes("-topmost", True)
+        self.perf_panel.protocol("WM_DELETE_WINDOW", self.toggle_perf_panel)
+        label = tk.Label(self.perf_panel, font=("Consolas", 9), bg='#2c2c2c', fg='white', justify='left', anchor='nw')
+        label.pack(fill='both', expand=True, padx=8, pady=8)
+        def refresh():
+            if self.perf_panel is None: return
+            lines = [f"{'function':<34}{'calls':>8}{'total ms':>11}{'mean':>9}{'max':>9}"]
+            for name, row in list(self.perf.summary().items())[:20]:
+                lines.append(f"{name[:33]:<34}{row['count']:>8}{row['total_ms']:>11.1f}{row['mean_ms']:>9.2f}{row['max_ms']:>9.1f}")
+            lines.append("")
+            lines.extend(f"{key}: {value}" for key, value in self.perf_extra().items())
+            label.config(text="\n".join(lines))
+            self.perf_panel.after(1000, refresh)
+        refresh()
+
     def on_exit(self):
-        self.save_data()
+        if self.perf is not None:
+            self.perf.dump(time.strftime("perf-%Y%m%d-%H%M%S.json"), self.perf_extra())
+        self.flush_data(compact=True) # Leaves a complete, hand-editable act.txt behind
+        self.writer.close()
+        if self.writer.error: messagebox.showerror("Account Lister", f"Could not save {DATA_FILE}: {self.writer.error}")
+        if self.instance_lock is not None: self.instance_lock.release()
         self.root.destroy()
 
     def run(self):
         self.root.mainloop()
 
 if __name__ == "__main__":
-    if platform.system() == "Windows":
+    parser = argparse.ArgumentParser(description="Account helper overlay for Project 1999.")
+    parser.add_argument("--profile-startup", action="store_true", help="print time-to-first-paint and time-to-fully-populated")
+    parser.add_argument("--perf", action="store_true", help="record hot-path timings (F12 shows them) and save them to perf-*.json on exit")
+    parser.add_argument("--renderer", choices=["canvas", "widgets"], default="widgets",
+                        help="draw rows as nested widgets (default) or as lightweight canvas items")
+    parser.add_argument("--import", dest="import_file", metavar="FILE", help="add the accounts in a CSV or JSON Lines file to act.txt, then exit")
+    parser.add_argument("--on-duplicate", choices=["skip", "merge"], default="skip",
+                        help="with --import, keep (skip) or update (merge) characters that already exist")
+    parser.add_argument("--export", metavar="FILE", help="write every account to a CSV or JSON Lines file, then exit")
+    parser.add_argument("--get", metavar="NAME", help="print one character's details, then exit")
+    parser.add_argument("--list", action="store_true", help="print every character (filtered by --server and --class), then exit")
+    parser.add_argument("--server", help="show this server (with --list, only list characters on it)")
+    parser.add_argument("--select", metavar="NAME", help="select this character on startup, or in the already running window")
+    parser.add_argument("--class", dest="eq_class", help="with --list, only list characters of this class")
+    parser.add_argument("--json", action="store_true", help="print --get and --list results as JSON")
+    args = parser.parse_args()
+    if args.server is not None: args.server = match_choice(args.server, ["All"] + AccountStore.SERVERS) or parser.error(f"unknown server {args.server!r}")
+    if args.eq_class is not None: args.eq_class = match_choice(args.eq_class, EQ_CLASSES) or parser.error(f"unknown class {args.eq_class!r}")
+    if args.get or args.list: sys.exit(run_query_command(args))
+    # Only one process may write act.txt: a second launch hands its request to the running window.
+    lock = InstanceLock(DATA_FILE)
+    if args.import_file:
+        if not lock.acquire():
+            print("Account Lister is running; close it or use its Import button.", file=sys.stderr); sys.exit(1)
+        status = run_roster_command(args)
+        lock.release()
+        sys.exit(status)
+    if args.export: sys.exit(run_roster_command(args))
+    if not lock.acquire():
+        if lock.hand_off({"server": args.server, "select": args.select}): sys.exit(0)
+        print("Account Lister seems to be running but did not answer.", file=sys.stderr); sys.exit(1)
+    lock.listen() # Launches made while the window is still loading wait in the socket's backlog
+    if PLATFORM == "Windows":
         try:
             import ctypes
             ctypes.windll.shcore.SetProcessDpiAwareness(1)
         except Exception as e:
             print(f"Could not set DPI awareness: {e}")
-    app = actlist()
+    app = actlist(profile_startup=args.profile_startup, perf=args.perf, renderer=args.renderer, instance_lock=lock)
+    if args.server or args.select: app.handle_handoff({"server": args.server, "select": args.select})
     app.run()